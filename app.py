@@ -1,48 +1,69 @@
 import io
-from fastapi import FastAPI, HTTPException,UploadFile, File,Form,BackgroundTasks
-from fastapi.responses import JSONResponse
+import json
+import asyncio
+from fastapi import FastAPI, HTTPException,UploadFile, File,Form, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import List
 from PIL import Image
 from service.rag import RagEngine
+from config.qdrant import get_embeddings
+from config.rag import warm_up
 from service.ingest import Ingest
-from service.OCR import OCRService
+from service.ingestJobs import IngestJobManager
+from service.OCR import OCRExecutor
 from service.rawText2json import RawText2JsonService
 from service.databaseOperations import DatabaseOperations
-from schemas.request_response import QueryRequest, QueryResponse, IngestResponse,ReceiptParseResponse
+from service.receiptCache import ReceiptCache
+from schemas.request_response import QueryRequest, QueryResponse, IngestResponse, IngestJobStatus, ReceiptParseResponse
 import os
 from dotenv import load_dotenv
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, aclosing
 
 load_dotenv()
 
 
 rag_engine: RagEngine | None = None
 ingest_engine: Ingest | None = None
-ocr_service: OCRService | None = None
+ingest_jobs: IngestJobManager | None = None
+ocr_executor: OCRExecutor | None = None
 raw_text2json: RawText2JsonService | None = None
 database_operations: DatabaseOperations | None = None
+receipt_cache: ReceiptCache | None = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global rag_engine, ingest_engine, database_operations, ocr_service, raw_text2json
+    global rag_engine, ingest_engine, ingest_jobs, database_operations, ocr_executor, raw_text2json, receipt_cache
+
+    await run_in_threadpool(warm_up)
 
     rag_engine = RagEngine()
 
     ingest_engine = Ingest()
 
+    ingest_jobs = IngestJobManager(ingest_engine)
+    ingest_jobs.resume()
+
     database_operations = DatabaseOperations()
 
-    ocr_service = OCRService()
+    ocr_executor = OCRExecutor()
 
     raw_text2json = RawText2JsonService()
 
+    receipt_cache = ReceiptCache()
+
     yield 
 
+    ocr_executor.shutdown()
+    ingest_jobs.shutdown()
+
     rag_engine = None
     ingest_engine = None
+    ingest_jobs = None
     database_operations = None
-    ocr_service = None
+    ocr_executor = None
     raw_text2json = None
+    receipt_cache = None
 
 app = FastAPI(
     title="RAG Customer Support API",
@@ -61,6 +82,15 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "embeddings": get_embeddings().stats(),
+        "receipt_parsing": dict(raw_text2json.stats) if raw_text2json else {},
+        "ocr_preprocessing": dict(ocr_executor.preprocess_paths) if ocr_executor else {},
+    }
+
+
 @app.post("/ask", response_model=QueryResponse)
 async def ask_question(payload: QueryRequest):
     if not rag_engine:
@@ -80,73 +110,168 @@ async def ask_question(payload: QueryRequest):
 
 
 
-@app.post("/ingest/company", response_model=IngestResponse)
+@app.post("/ask/stream")
+async def ask_question_stream(payload: QueryRequest, request: Request):
+    if not rag_engine:
+        raise HTTPException(status_code=503, detail="RAG engine not initialized")
+
+    async def events():
+        stream = rag_engine.stream_answer(
+            company_name=payload.company_name,
+            question=payload.query,
+        )
+
+        try:
+            async with aclosing(stream):
+                async for event in stream:
+                    if await request.is_disconnected():
+                        break
+                    yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/ingest/company", response_model=IngestResponse, status_code=202)
 async def ingest_company_documents(
     company_name: str = Form(...),
     files: list[UploadFile] = File(...)
 ):
-    if not ingest_engine:
+    if not ingest_jobs:
         raise HTTPException(status_code=503, detail="Ingest engine not initialized")
 
     try:
         files_data = [
             {
                 "filename": f.filename,
-                "content": await f.read()
+                "file": f.file
             }
             for f in files
         ]
 
-        num_chunks = ingest_engine.ingest_company_data(
+        job_id = await run_in_threadpool(
+            ingest_jobs.submit,
             company_name,
             files_data,
         )
 
         return IngestResponse(
-            status="success",
-            message=f"Ingestion complete for company '{company_name}'. Processed {num_chunks} chunks."
+            status="queued",
+            message=f"Ingestion queued for company '{company_name}'.",
+            job_id=job_id
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.get("/ingest/jobs/{job_id}", response_model=IngestJobStatus)
+async def get_ingest_job(job_id: str):
+    if not ingest_jobs:
+        raise HTTPException(status_code=503, detail="Ingest engine not initialized")
+
+    job = await run_in_threadpool(ingest_jobs.get, job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingest job: {job_id}")
+
+    return IngestJobStatus(**job)
+
 @app.post("/receipt/parse", response_model=ReceiptParseResponse)
 async def parse_receipt(files: List[UploadFile] = File(...)):
-    if not all([ocr_service, raw_text2json, database_operations]):
+    if not all([ocr_executor, raw_text2json, database_operations, receipt_cache]):
         raise HTTPException(status_code=503, detail="Services not initialized")
 
-    parsed_results = []
+    async def ocr_file(file: UploadFile, content: bytes) -> str:
+        try:
+            return await ocr_executor.extract_text(
+                file_bytes=content,
+                content_type=file.content_type
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type: {file.filename}"
+            )
 
     try:
-        for file in files:
-            content = await file.read()
-
-            try:
-                ocr_text = ocr_service.extract_text(
-                    file_bytes=content,
-                    content_type=file.content_type
-                )
-            except ValueError:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file type: {file.filename}"
-                )
+        contents = [await file.read() for file in files]
+        file_keys = [receipt_cache.file_key(content) for content in contents]
+
+        # Identical files in one upload are OCR'd, parsed and saved once;
+        # the result is fanned out to every copy at the end.
+        first_index: dict[str, int] = {}
+        for i, key in enumerate(file_keys):
+            first_index.setdefault(key, i)
+
+        results: dict[str, dict] = {}
+        for key in first_index:
+            hit = await receipt_cache.aget(key)
+            if hit is not None:
+                results[key] = hit
+
+        pending = [key for key in first_index if key not in results]
+        ocr_texts = await asyncio.gather(
+            *(ocr_file(files[first_index[key]], contents[first_index[key]]) for key in pending)
+        )
 
+        # Different files (two scans of one receipt) can still OCR to the
+        # same text; those are grouped too.
+        by_text: dict[str, tuple[str, list[str]]] = {}
+        for key, ocr_text in zip(pending, ocr_texts):
             if not ocr_text.strip():
                 continue
+            text_key = receipt_cache.text_key(ocr_text)
+            by_text.setdefault(text_key, (ocr_text, []))[1].append(key)
 
-            parsed_receipt = raw_text2json.parse_receipt(ocr_text)
+        to_parse = []
 
-            if not parsed_receipt:
+        for text_key, (ocr_text, keys) in by_text.items():
+            hit = await receipt_cache.aget(text_key)
+
+            if hit is not None:
+                entry = await receipt_cache.aput(
+                    keys, ocr_text, hit["data"], hit["receipt_id"]
+                )
+                results.update(dict.fromkeys(keys, entry))
                 continue
 
-            receipt_id = database_operations.save_receipt(parsed_receipt)
+            to_parse.append((text_key, ocr_text, keys))
 
-            parsed_results.append({
+        parsed_receipts = await raw_text2json.aparse_receipts(
+            [ocr_text for _, ocr_text, _ in to_parse]
+        )
+
+        parsed = [
+            (entry, parsed_receipt)
+            for entry, parsed_receipt in zip(to_parse, parsed_receipts)
+            if parsed_receipt
+        ]
+        receipt_ids = await database_operations.asave_receipts(
+            [parsed_receipt for _, parsed_receipt in parsed]
+        )
+
+        for ((text_key, ocr_text, keys), parsed_receipt), receipt_id in zip(parsed, receipt_ids):
+            entry = await receipt_cache.aput(
+                [*keys, text_key], ocr_text, parsed_receipt, receipt_id
+            )
+            results.update(dict.fromkeys(keys, entry))
+
+        parsed_results = [
+            {
                 "filename": file.filename,
-                "receipt_id": receipt_id,
-                "data": parsed_receipt
-            })
+                "receipt_id": results[key]["receipt_id"],
+                "data": results[key]["data"]
+            }
+            for file, key in zip(files, file_keys)
+            if key in results
+        ]
 
         if not parsed_results:
             raise HTTPException(
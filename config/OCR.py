@@ -8,3 +8,22 @@ if os.getenv("TESSERACT_PATH") is not None:
     pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_PATH")
 
 POPPLER_PATH = os.getenv("POPPLER_PATH")
+
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS") or os.cpu_count() or 1)
+OCR_MAX_PENDING = int(os.getenv("OCR_MAX_PENDING") or OCR_MAX_WORKERS * 2)
+
+OCR_PDF_DPI = int(os.getenv("OCR_PDF_DPI") or 200)
+OCR_PDF_WINDOW = int(os.getenv("OCR_PDF_WINDOW") or 4)
+OCR_PDF_THREADS = int(os.getenv("OCR_PDF_THREADS") or OCR_PDF_WINDOW)
+
+# Preprocessing shrinks images to about this effective DPI and only blurs
+# or deskews when the measured noise / skew exceed these limits.
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI") or 300)
+OCR_NOISE_SIGMA = float(os.getenv("OCR_NOISE_SIGMA") or 5.0)
+OCR_DESKEW_MIN_ANGLE = float(os.getenv("OCR_DESKEW_MIN_ANGLE") or 1.0)
+
+# "auto" uses in-process tesserocr handles when the package is installed and
+# falls back to the pytesseract subprocess otherwise.
+OCR_BACKEND = (os.getenv("OCR_BACKEND") or "auto").lower()
+OCR_LANG = os.getenv("OCR_LANG") or "eng"
+TESSDATA_PATH = os.getenv("TESSDATA_PATH")
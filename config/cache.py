@@ -0,0 +1,14 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RECEIPT_CACHE_MAX_ENTRIES = int(os.getenv("RECEIPT_CACHE_MAX_ENTRIES") or 50000)
+RECEIPT_CACHE_MEMORY_ENTRIES = int(os.getenv("RECEIPT_CACHE_MEMORY_ENTRIES") or 2048)
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR") or "./db/embeddings"
+EMBEDDING_QUERY_CACHE_SIZE = int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE") or 4096)
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES") or 512)
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL") or 3600)
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY") or 0.95)
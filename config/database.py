@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
@@ -6,11 +7,50 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or 10)
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW") or 20)
+DB_POOL_PRE_PING = (os.getenv("DB_POOL_PRE_PING") or "true").lower() in ("1", "true", "yes")
+DB_ASYNC = (os.getenv("DB_ASYNC") or "").lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+_ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
+
+_URL = make_url(DATABASE_URL)
+_IS_SQLITE = _URL.get_backend_name() == "sqlite"
+
+
+def _engine_options() -> dict:
+    options = {}
+
+    if _IS_SQLITE:
+        options["connect_args"] = {"check_same_thread": False}
+        if _URL.database in (None, "", ":memory:"):
+            return options
+
+    options["pool_size"] = DB_POOL_SIZE
+    options["max_overflow"] = DB_MAX_OVERFLOW
+    options["pool_pre_ping"] = DB_POOL_PRE_PING
+    return options
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+
+# WAL lets readers run alongside the single writer, and NORMAL sync is
+# durable across application crashes (only an OS crash can lose the tail).
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+engine = create_engine(DATABASE_URL, **_engine_options())
+
+if _IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -20,7 +60,51 @@ SessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+_ASYNC_ENGINE = None
+_ASYNC_SESSION = None
+
+
+def _async_url():
+    if ASYNC_DATABASE_URL:
+        return make_url(ASYNC_DATABASE_URL)
+
+    backend = _URL.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for database backend '{backend}'")
+
+    return _URL.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}")
+
+
+def get_async_engine():
+    global _ASYNC_ENGINE
+
+    if _ASYNC_ENGINE is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        options = _engine_options()
+        options.pop("connect_args", None)
+        _ASYNC_ENGINE = create_async_engine(_async_url(), **options)
+
+        if _IS_SQLITE:
+            event.listen(_ASYNC_ENGINE.sync_engine, "connect", _set_sqlite_pragmas)
+
+    return _ASYNC_ENGINE
+
+
+def get_async_sessionmaker():
+    global _ASYNC_SESSION
+
+    if _ASYNC_SESSION is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _ASYNC_SESSION = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+    return _ASYNC_SESSION
+
 def init_db()->None:
     from schemas import DataModels
     Base.metadata.create_all(bind=engine)
-
@@ -1,7 +1,6 @@
 from google import genai
 from google.genai import types
 import os
-import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -35,8 +34,53 @@ JSON schema:
 
 OCR TEXT:
 """
-GENAI_CLIENT=genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
 GENAI_MODEL=os.getenv("LLM_MODEL")
+GENAI_MAX_CONCURRENCY = int(os.getenv("GENAI_MAX_CONCURRENCY") or 8)
+GENAI_MAX_RETRIES = int(os.getenv("GENAI_MAX_RETRIES") or 4)
+GENAI_BACKOFF_BASE = float(os.getenv("GENAI_BACKOFF_BASE") or 1.0)
+GENAI_BACKOFF_MAX = float(os.getenv("GENAI_BACKOFF_MAX") or 30.0)
+GENAI_TIMEOUT = float(os.getenv("GENAI_TIMEOUT") or 60.0)
+GENAI_FAKE_LATENCY = os.getenv("GENAI_FAKE_LATENCY")
+GENAI_BATCH_MODE = (os.getenv("GENAI_BATCH_MODE") or "").lower() in ("1", "true", "yes")
+GENAI_BATCH_TOKEN_BUDGET = int(os.getenv("GENAI_BATCH_TOKEN_BUDGET") or 8000)
+GENAI_BATCH_MAX_RECEIPTS = int(os.getenv("GENAI_BATCH_MAX_RECEIPTS") or 20)
+
+# Receipts the local rule-based parser reads with at least this confidence
+# skip Gemini entirely.
+RECEIPT_HEURISTICS = (os.getenv("RECEIPT_HEURISTICS") or "true").lower() in ("1", "true", "yes")
+RECEIPT_HEURISTIC_MIN_CONFIDENCE = float(os.getenv("RECEIPT_HEURISTIC_MIN_CONFIDENCE") or 0.8)
+# How to read ambiguous numeric dates such as 03/04/2024 ("DMY" or "MDY"),
+# and which currency a bare "$" means.
+RECEIPT_DATE_ORDER = os.getenv("RECEIPT_DATE_ORDER") or "DMY"
+RECEIPT_DOLLAR_CURRENCY = os.getenv("RECEIPT_DOLLAR_CURRENCY") or "USD"
+
+GENAI_BATCH_PROMPT = """
+You are an expert receipt parser.
+
+You are given several receipts, each introduced by a line "=== RECEIPT <n> ===".
+Parse every receipt independently and return ONLY a valid JSON array with
+exactly one object per receipt. Set "receipt_index" to the receipt's <n>.
+
+Do NOT include explanations, markdown, or code blocks.
+If data is missing, return null.
+Normalize dates to YYYY-MM-DD.
+Fix OCR spelling errors.
+
+Each object follows the same schema as a single receipt:
+merchant_name, receipt_date, currency, tax_amount, total_amount and
+items (item_name, quantity, unit_price, total_price).
+
+RECEIPTS:
+"""
+GENAI_BATCH_MARKER = "=== RECEIPT {index} ==="
+
+
+# GENAI_FAKE_LATENCY=<seconds> swaps in an offline stand-in for the client.
+if GENAI_FAKE_LATENCY is not None:
+    from service.fakeGenai import FakeGenaiClient
+    GENAI_CLIENT = FakeGenaiClient(latency=float(GENAI_FAKE_LATENCY))
+else:
+    GENAI_CLIENT = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
 GENAI_RESPONSE_SCHEMA={
                         "type": "object",
                         "properties": {
@@ -72,4 +116,16 @@ GENAI_RESPONSE_SCHEMA={
                             "total_amount",
                             "items"
                         ]
-                    }
\ No newline at end of file
+                    }
+
+GENAI_BATCH_RESPONSE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "receipt_index": {"type": "integer"},
+            **GENAI_RESPONSE_SCHEMA["properties"],
+        },
+        "required": ["receipt_index", *GENAI_RESPONSE_SCHEMA["required"]],
+    },
+}
@@ -3,4 +3,17 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-DATA_PATH = os.getenv("DATA_PATH") or "./datasource"
\ No newline at end of file
+DATA_PATH = os.getenv("DATA_PATH") or "./datasource"
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE") or 64)
+INGEST_UPSERT_WORKERS = int(os.getenv("INGEST_UPSERT_WORKERS") or 2)
+INGEST_MAX_PENDING_BATCHES = int(os.getenv("INGEST_MAX_PENDING_BATCHES") or 4)
+
+INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS") or 1)
+INGEST_JOB_DIR = os.getenv("INGEST_JOB_DIR") or "./db/ingest_jobs"
+
+# Offline bulk loads (python main.py ingest) over DATA_PATH.
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS") or os.cpu_count() or 1)
+INGEST_BULK_BATCH_SIZE = int(os.getenv("INGEST_BULK_BATCH_SIZE") or 512)
+INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH") or "./db/ingest_manifest.jsonl"
+# CSV rows turned into documents per vectorized block.
+INGEST_CSV_CHUNK_ROWS = int(os.getenv("INGEST_CSV_CHUNK_ROWS") or 10000)
@@ -1,9 +1,20 @@
 import os
+import threading
+from functools import wraps
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import (
+    VectorParams, VectorParamsDiff, Distance, PayloadSchemaType, KeywordIndexParams,
+    Filter, FieldCondition, MatchValue, HnswConfigDiff, CollectionParamsDiff,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    SearchParams, QuantizationSearchParams, SparseVectorParams, Modifier,
+)
 from langchain_qdrant import QdrantVectorStore
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 from dotenv import load_dotenv
+from service.embeddingCache import CachedEmbeddings
+from service.embeddingBatcher import QueryBatcher
 
 load_dotenv()
 
@@ -14,52 +25,265 @@ _QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 _EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL") or "sentence-transformers/all-MiniLM-L6-v2"
 _COMPANY_NAME = os.getenv("COLLECTION_NAME") or "aeeris"
 
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS") or 5)
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE") or 32)
+
+QDRANT_MULTITENANT = (os.getenv("QDRANT_MULTITENANT") or "").lower() in ("1", "true", "yes")
+QDRANT_SHARED_COLLECTION = os.getenv("QDRANT_SHARED_COLLECTION") or "companies"
+
+# Unset values keep Qdrant's own defaults.
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M")) if os.getenv("QDRANT_HNSW_M") else None
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT")) if os.getenv("QDRANT_HNSW_EF_CONSTRUCT") else None
+QDRANT_SEARCH_EF = int(os.getenv("QDRANT_SEARCH_EF")) if os.getenv("QDRANT_SEARCH_EF") else None
+QDRANT_QUANTIZATION = (os.getenv("QDRANT_QUANTIZATION") or "").lower()
+QDRANT_QUANTIZATION_OVERSAMPLING = float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING") or 2.0)
+QDRANT_VECTORS_ON_DISK = (os.getenv("QDRANT_VECTORS_ON_DISK") or "").lower() in ("1", "true", "yes")
+QDRANT_PAYLOAD_ON_DISK = (os.getenv("QDRANT_PAYLOAD_ON_DISK") or "").lower() in ("1", "true", "yes")
+
+# Hybrid retrieval stores a BM25-style sparse vector next to the dense one.
+# Only collections created while this is on get the sparse vector.
+QDRANT_HYBRID = (os.getenv("QDRANT_HYBRID") or "").lower() in ("1", "true", "yes")
+QDRANT_SPARSE_VECTOR_NAME = os.getenv("QDRANT_SPARSE_VECTOR_NAME") or "sparse"
+
+# The embedded (path-based) client is not safe to call from several threads;
+# get_qdrant_client() serialises every call on it.
+QDRANT_IS_LOCAL = not (_QDRANT_ENDPOINT.startswith("http") and _QDRANT_API_KEY)
+
 _EMBEDDINGS = None
 
-def get_embeddings() -> HuggingFaceEmbeddings:
+# Process-wide registry of collections known to exist, with their vector
+# params, so requests do not have to ask Qdrant on every call.
+_COLLECTIONS: dict[str, VectorParams] = {}
+_SPARSE_COLLECTIONS: set[str] = set()
+_COLLECTION_LOCKS: dict[str, threading.Lock] = {}
+_REGISTRY_LOCK = threading.Lock()
+_VECTOR_SIZES: dict[str, int] = {}
+
+def get_embeddings() -> Embeddings:
     global _EMBEDDINGS
     if _EMBEDDINGS is None:
-        _EMBEDDINGS = HuggingFaceEmbeddings(model_name=_EMBEDDING_MODEL)
+        model = HuggingFaceEmbeddings(model_name=_EMBEDDING_MODEL)
+        _EMBEDDINGS = CachedEmbeddings(
+            model,
+            _EMBEDDING_MODEL,
+            query_batcher=QueryBatcher(
+                model,
+                max_wait_ms=EMBEDDING_BATCH_MAX_WAIT_MS,
+                max_batch_size=EMBEDDING_BATCH_MAX_SIZE,
+            ),
+        )
     return _EMBEDDINGS
 
+class _LockedQdrantClient(QdrantClient):
+    """Embedded client whose public methods run one at a time.
+
+    Ingest jobs, bulk upserts and /ask searches all call the client from
+    different threads; the local store corrupts its in-memory state when
+    they overlap.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._call_lock = threading.RLock()
+        super().__init__(*args, **kwargs)
+
+    def __getattribute__(self, name):
+        attr = super().__getattribute__(name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        lock = super().__getattribute__("_call_lock")
+
+        @wraps(attr)
+        def locked(*args, **kwargs):
+            with lock:
+                return attr(*args, **kwargs)
+
+        return locked
+
+
 def get_qdrant_client() -> QdrantClient:
     global _QDRANT_CLIENT
 
     if _QDRANT_CLIENT is None:
-        if _QDRANT_ENDPOINT.startswith("http") and _QDRANT_API_KEY:
+        if not QDRANT_IS_LOCAL:
             _QDRANT_CLIENT = QdrantClient(
                 url=_QDRANT_ENDPOINT,
                 api_key=_QDRANT_API_KEY,
                 timeout=60,
             )
         else:
-            _QDRANT_CLIENT = QdrantClient(path=_QDRANT_ENDPOINT,timeout=60)
+            _QDRANT_CLIENT = _LockedQdrantClient(path=_QDRANT_ENDPOINT, timeout=60)
 
     return _QDRANT_CLIENT
 
 
-def get_company_vectorstore(company_name: str = _COMPANY_NAME) -> QdrantVectorStore:
-    client = get_qdrant_client()
+def tenant_id_for(company_name: str) -> str:
+    return company_name.lower().replace(" ", "_")
+
+
+def collection_name_for(company_name: str) -> str:
+    if QDRANT_MULTITENANT:
+        return QDRANT_SHARED_COLLECTION
+    return tenant_id_for(company_name)
+
+
+def tenant_filter(company_name: str) -> Filter | None:
+    if not QDRANT_MULTITENANT:
+        return None
+
+    return Filter(must=[
+        FieldCondition(
+            key="metadata.company",
+            match=MatchValue(value=tenant_id_for(company_name)),
+        )
+    ])
+
+
+def get_embedding_dimension() -> int:
+    if _EMBEDDING_MODEL not in _VECTOR_SIZES:
+        _VECTOR_SIZES[_EMBEDDING_MODEL] = len(get_embeddings().embed_query("dimension-check"))
+    return _VECTOR_SIZES[_EMBEDDING_MODEL]
+
+
+def _collection_lock(collection_name: str) -> threading.Lock:
+    with _REGISTRY_LOCK:
+        return _COLLECTION_LOCKS.setdefault(collection_name, threading.Lock())
+
+
+def _hnsw_config() -> HnswConfigDiff | None:
+    if QDRANT_HNSW_M is None and QDRANT_HNSW_EF_CONSTRUCT is None:
+        return None
+    return HnswConfigDiff(m=QDRANT_HNSW_M, ef_construct=QDRANT_HNSW_EF_CONSTRUCT)
+
+
+def _quantization_config() -> ScalarQuantization | None:
+    if QDRANT_QUANTIZATION != "int8":
+        return None
+
+    # Quantized vectors stay in RAM for the graph walk; the originals can
+    # live on disk and are only read to rescore the final candidates.
+    return ScalarQuantization(
+        scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8,
+            quantile=0.99,
+            always_ram=True,
+        )
+    )
+
 
-    collection_name = company_name.lower().replace(" ", "_")
+def search_params() -> SearchParams | None:
+    if QDRANT_SEARCH_EF is None and _quantization_config() is None:
+        return None
 
-    embeddings = get_embeddings()
+    return SearchParams(
+        hnsw_ef=QDRANT_SEARCH_EF,
+        quantization=QuantizationSearchParams(
+            rescore=True,
+            oversampling=QDRANT_QUANTIZATION_OVERSAMPLING,
+        ) if _quantization_config() else None,
+    )
 
-    existing = [c.name for c in client.get_collections().collections]
 
-    if collection_name not in existing:
-        vector_size = len(embeddings.embed_query("dimension-check"))
+def apply_collection_settings(collection_name: str) -> None:
+    get_qdrant_client().update_collection(
+        collection_name=collection_name,
+        vectors_config={"": VectorParamsDiff(on_disk=True)} if QDRANT_VECTORS_ON_DISK else None,
+        collection_params=CollectionParamsDiff(on_disk_payload=True) if QDRANT_PAYLOAD_ON_DISK else None,
+        hnsw_config=_hnsw_config(),
+        quantization_config=_quantization_config(),
+    )
 
-        client.create_collection(
+
+def _create_collection(client: QdrantClient, collection_name: str) -> VectorParams:
+    vectors_config = VectorParams(
+        size=get_embedding_dimension(),
+        distance=Distance.COSINE,
+        on_disk=QDRANT_VECTORS_ON_DISK or None,
+    )
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=vectors_config,
+        on_disk_payload=QDRANT_PAYLOAD_ON_DISK or None,
+        sparse_vectors_config={
+            QDRANT_SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF),
+        } if QDRANT_HYBRID else None,
+        hnsw_config=_hnsw_config(),
+        quantization_config=_quantization_config(),
+    )
+
+    client.create_payload_index(
+        collection_name=collection_name,
+        field_name="metadata.source",
+        field_schema=PayloadSchemaType.KEYWORD,
+    )
+
+    if collection_name == QDRANT_SHARED_COLLECTION:
+        # Tenant indexes let Qdrant co-locate each company's points and
+        # serve filtered searches without scanning other tenants.
+        client.create_payload_index(
             collection_name=collection_name,
-            vectors_config=VectorParams(
-                size=vector_size,
-                distance=Distance.COSINE,
-            ),
+            field_name="metadata.company",
+            field_schema=KeywordIndexParams(type="keyword", is_tenant=True),
         )
 
+    return vectors_config
+
+
+def ensure_collection(collection_name: str) -> VectorParams:
+    vectors_config = _COLLECTIONS.get(collection_name)
+    if vectors_config is not None:
+        return vectors_config
+
+    # Concurrent first requests for the same company wait here, so only one
+    # of them talks to Qdrant and creates the collection.
+    with _collection_lock(collection_name):
+        if collection_name in _COLLECTIONS:
+            return _COLLECTIONS[collection_name]
+
+        client = get_qdrant_client()
+
+        if not client.collection_exists(collection_name):
+            try:
+                _create_collection(client, collection_name)
+            except Exception:
+                # Another process may have created it in the meantime.
+                if not client.collection_exists(collection_name):
+                    raise
+
+        params = client.get_collection(collection_name).config.params
+        if QDRANT_SPARSE_VECTOR_NAME in (params.sparse_vectors or {}):
+            _SPARSE_COLLECTIONS.add(collection_name)
+
+        _COLLECTIONS[collection_name] = params.vectors
+        return params.vectors
+
+
+def has_sparse_vectors(collection_name: str) -> bool:
+    ensure_collection(collection_name)
+    return collection_name in _SPARSE_COLLECTIONS
+
+
+def forget_collection(collection_name: str) -> None:
+    _COLLECTIONS.pop(collection_name, None)
+    _SPARSE_COLLECTIONS.discard(collection_name)
+
+
+def is_missing_collection(error: Exception) -> bool:
+    # A server answers 404; the embedded client raises ValueError.
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 404
+    return isinstance(error, ValueError) and str(error).endswith("not found")
+
+
+def get_company_vectorstore(company_name: str = _COMPANY_NAME) -> QdrantVectorStore:
+    collection_name = collection_name_for(company_name)
+
+    ensure_collection(collection_name)
+
     return QdrantVectorStore(
-        client=client,
+        client=get_qdrant_client(),
         collection_name=collection_name,
-        embedding=embeddings,
+        embedding=get_embeddings(),
+        validate_collection_config=False,
     )
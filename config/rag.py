@@ -1,25 +1,43 @@
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
 from dotenv import load_dotenv
 
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_classic.chains import RetrievalQA
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client.models import Filter, SearchParams
 from langchain_classic.prompts import PromptTemplate
 
-from config.qdrant import get_company_vectorstore
+from config.qdrant import (
+    get_company_vectorstore,
+    get_embeddings,
+    tenant_id_for,
+    tenant_filter,
+    search_params,
+)
 
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY") or ""
 LLM_MODEL = os.getenv("LLM_MODEL") or "gemini-2.5-flash"
 
-_RAG_CLIENTS: dict[str, RetrievalQA] = {}
-
-
-def get_rag_client(company_name: str) -> RetrievalQA:
-    if company_name in _RAG_CLIENTS:
-        return _RAG_CLIENTS[company_name]
-
-    PROMPT_TEMPLATE = """
+RAG_CLIENT_CACHE_SIZE = int(os.getenv("RAG_CLIENT_CACHE_SIZE") or 256)
+RAG_CLIENT_TTL = float(os.getenv("RAG_CLIENT_TTL") or 3600)
+RAG_FETCH_K = int(os.getenv("RAG_FETCH_K") or 8)
+RAG_TOP_K = int(os.getenv("RAG_TOP_K") or 3)
+RAG_SCORE_CUTOFF = float(os.getenv("RAG_SCORE_CUTOFF") or 0.35)
+RAG_DEDUP_SIMILARITY = float(os.getenv("RAG_DEDUP_SIMILARITY") or 0.9)
+RAG_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS") or 1500)
+RAG_HYBRID_RRF_K = int(os.getenv("RAG_HYBRID_RRF_K") or 60)
+RAG_WARMUP_COMPANIES = [
+    company.strip()
+    for company in (os.getenv("RAG_WARMUP_COMPANIES") or "").split(",")
+    if company.strip()
+]
+
+PROMPT_TEMPLATE = """
 You are a customer support assistant answering questions strictly from internal business documents.
 
 INSTRUCTIONS (follow all exactly):
@@ -40,31 +58,75 @@ Question:
 Answer:
 """
 
+RAG_PROMPT = PromptTemplate.from_template(PROMPT_TEMPLATE)
 
-    vectorstore = get_company_vectorstore(company_name)
+NO_ANSWER = "I don't have that information in our documents."
 
-    model = ChatGoogleGenerativeAI(
-        model=LLM_MODEL,
-        google_api_key=GOOGLE_API_KEY,
-        temperature=0.0,
-        convert_system_message_to_human=True,
-    )
+_LLM: ChatGoogleGenerativeAI | None = None
+
+class RagClient(NamedTuple):
+    """What retrieval needs for one company; the LLM is shared."""
+
+    vectorstore: QdrantVectorStore
+    filter: Filter | None
+    search_params: SearchParams | None
+
+
+# tenant id -> (expires_at, client), least recently used first.
+_RAG_CLIENTS: OrderedDict[str, tuple[float, RagClient]] = OrderedDict()
+_RAG_CLIENTS_LOCK = threading.Lock()
+
+
+def get_llm() -> ChatGoogleGenerativeAI:
+    global _LLM
+    if _LLM is None:
+        _LLM = ChatGoogleGenerativeAI(
+            model=LLM_MODEL,
+            google_api_key=GOOGLE_API_KEY,
+            temperature=0.0,
+            convert_system_message_to_human=True,
+        )
+    return _LLM
 
-    prompt = PromptTemplate.from_template(PROMPT_TEMPLATE)
-
-    rag_client = RetrievalQA.from_chain_type(
-        llm=model,
-        chain_type="stuff",
-        retriever=vectorstore.as_retriever(
-            search_type="similarity",
-            search_kwargs={
-                "k": 3,
-            },
-        ),
-        chain_type_kwargs={"prompt": prompt},
-        return_source_documents=True,
+
+def _build_rag_client(company_name: str) -> RagClient:
+    return RagClient(
+        vectorstore=get_company_vectorstore(company_name),
+        filter=tenant_filter(company_name),
+        search_params=search_params(),
     )
 
 
-    _RAG_CLIENTS[company_name] = rag_client
+def get_rag_client(company_name: str) -> RagClient:
+    key = tenant_id_for(company_name)
+
+    with _RAG_CLIENTS_LOCK:
+        entry = _RAG_CLIENTS.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            _RAG_CLIENTS.move_to_end(key)
+            return entry[1]
+
+    rag_client = _build_rag_client(company_name)
+
+    with _RAG_CLIENTS_LOCK:
+        _RAG_CLIENTS[key] = (time.monotonic() + RAG_CLIENT_TTL, rag_client)
+        _RAG_CLIENTS.move_to_end(key)
+        while len(_RAG_CLIENTS) > RAG_CLIENT_CACHE_SIZE:
+            _RAG_CLIENTS.popitem(last=False)
+
     return rag_client
+
+
+def forget_rag_client(company_name: str) -> None:
+    with _RAG_CLIENTS_LOCK:
+        _RAG_CLIENTS.pop(tenant_id_for(company_name), None)
+
+
+def warm_up(companies: list[str] = RAG_WARMUP_COMPANIES) -> None:
+    # Loads the sentence-transformers model and runs its first forward pass
+    # before traffic arrives. The wrapped model is called directly: through
+    # the disk cache a second start would find "warm-up" and skip the pass.
+    get_embeddings().embeddings.embed_query("warm-up")
+
+    for company_name in companies:
+        get_rag_client(company_name)
@@ -1,7 +1,149 @@
-from service.rag import RagEngine
-from service.ingest import Ingest
+import argparse
+import time
+
+from PIL import Image
+
+from config.ingest import (
+    DATA_PATH,
+    INGEST_PARSE_WORKERS,
+    INGEST_BULK_BATCH_SIZE,
+    INGEST_UPSERT_WORKERS,
+    INGEST_MANIFEST_PATH,
+)
+from config.qdrant import get_qdrant_client, apply_collection_settings
+from service.bulkIngest import BulkIngest
+from service.OCR import OCRService
+from service.ocrBackends import PytesseractBackend, benchmark
+from service.tenantMigration import migrate_to_shared_collection
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintenance commands for the RAG store and OCR")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser(
+        "migrate-tenants",
+        help="Copy per-company collections into the shared multi-tenant collection",
+    )
+    migrate.add_argument("companies", nargs="*", help="Companies to migrate")
+    migrate.add_argument(
+        "--all",
+        action="store_true",
+        dest="all_collections",
+        help="Migrate every collection other than the shared one",
+    )
+    migrate.add_argument("--batch-size", type=int, default=256)
+    migrate.add_argument(
+        "--drop-source",
+        action="store_true",
+        help="Delete each per-company collection once it has been copied",
+    )
+
+    settings = commands.add_parser(
+        "apply-collection-settings",
+        help="Apply the configured HNSW, quantization and on-disk settings to existing collections",
+    )
+    settings.add_argument(
+        "collections",
+        nargs="*",
+        help="Collections to update (default: all)",
+    )
+
+    ingest = commands.add_parser(
+        "ingest",
+        help="Load DATA_PATH (one subdirectory per company) into Qdrant, resuming an interrupted run",
+    )
+    ingest.add_argument("companies", nargs="*", help="Companies to load (default: all)")
+    ingest.add_argument("--data-path", default=DATA_PATH)
+    ingest.add_argument("--workers", type=int, default=INGEST_PARSE_WORKERS, help="Parse processes")
+    ingest.add_argument("--batch-size", type=int, default=INGEST_BULK_BATCH_SIZE)
+    ingest.add_argument("--upsert-workers", type=int, default=INGEST_UPSERT_WORKERS)
+    ingest.add_argument("--manifest", default=INGEST_MANIFEST_PATH)
+    ingest.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint manifest and load every file again",
+    )
+
+    bench = commands.add_parser(
+        "benchmark-ocr",
+        help="Compare per-page OCR time of the tesserocr and pytesseract backends",
+    )
+    bench.add_argument("files", nargs="+", help="Receipt images or PDFs")
+    bench.add_argument("--repeat", type=int, default=3)
+    bench.add_argument(
+        "--backends",
+        nargs="+",
+        default=["pytesseract", "tesserocr"],
+        choices=["pytesseract", "tesserocr"],
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "migrate-tenants":
+        if not args.companies and not args.all_collections:
+            migrate.error("name the companies to migrate, or pass --all")
+
+        migrated, skipped = migrate_to_shared_collection(
+            companies=args.companies,
+            all_collections=args.all_collections,
+            batch_size=args.batch_size,
+            drop_source=args.drop_source,
+        )
+        for tenant_id, count in migrated.items():
+            print(f"{tenant_id}: {count} points")
+        for tenant_id, reason in skipped.items():
+            print(f"{tenant_id}: skipped ({reason})")
+
+    elif args.command == "apply-collection-settings":
+        collections = args.collections or [
+            collection.name for collection in get_qdrant_client().get_collections().collections
+        ]
+        for collection_name in collections:
+            apply_collection_settings(collection_name)
+            print(f"{collection_name}: updated")
+
+    elif args.command == "ingest":
+        started = time.monotonic()
+        last_report = 0.0
+
+        def report(company_name: str, stats: dict) -> None:
+            nonlocal last_report
+            if time.monotonic() - last_report >= 10:
+                last_report = time.monotonic()
+                rate = stats["chunks_upserted"] / max(last_report - started, 1e-9)
+                print(f"{company_name}: {stats} ({rate:.0f} chunks/s)", flush=True)
+
+        results = BulkIngest(
+            data_path=args.data_path,
+            parse_workers=args.workers,
+            batch_size=args.batch_size,
+            upsert_workers=args.upsert_workers,
+            manifest_path=args.manifest,
+        ).run(companies=args.companies, restart=args.restart, progress=report)
+
+        for company_name, stats in results.items():
+            print(f"{company_name}: {stats}")
+
+    elif args.command == "benchmark-ocr":
+        ocr = OCRService(backend=PytesseractBackend())
+        pages = _benchmark_pages(ocr, args.files)
+        print(f"preprocessing: {dict(ocr.preprocess_paths)}")
+        print(benchmark(pages, args.backends, repeat=args.repeat))
+
+
+def _benchmark_pages(ocr: OCRService, paths: list[str]) -> list:
+    # Pages are preprocessed once up front so only the engine call is timed.
+    pages = []
+    for path in paths:
+        if path.lower().endswith(".pdf"):
+            with open(path, "rb") as pdf:
+                for window in ocr._iter_pdf_windows(pdf.read()):
+                    pages.extend(ocr._processing(page, ocr.pdf_dpi) for page in window)
+        else:
+            pages.append(ocr._processing(Image.open(path).convert("L")))
+    return pages
+
 
 if __name__=="__main__":
-    ingest=Ingest()
-    ingest.ingest()
-    
\ No newline at end of file
+    main()
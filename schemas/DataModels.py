@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, JSON, ForeignKey
 from sqlalchemy.orm import relationship
 from config.database import Base
 
@@ -25,3 +25,28 @@ class ReceiptItem(Base):
     total_price = Column(Float)
 
     receipt = relationship("Receipt", back_populates="items")
+
+class ReceiptCacheEntry(Base):
+    __tablename__ = "receipt_cache"
+
+    key = Column(String(80), primary_key=True)
+    receipt_id = Column(Integer, ForeignKey("receipts.id"))
+    ocr_text = Column(Text)
+    data = Column(JSON)
+    last_used_at = Column(DateTime, index=True)
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(String(32), primary_key=True)
+    company_name = Column(String)
+    status = Column(String(16), index=True)
+    files = Column(JSON)
+    documents_loaded = Column(Integer, default=0)
+    chunks_embedded = Column(Integer, default=0)
+    chunks_skipped = Column(Integer, default=0)
+    chunks_upserted = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
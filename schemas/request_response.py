@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import datetime
 
 class Citation(BaseModel):
     source: str          
@@ -19,6 +20,21 @@ class QueryResponse(BaseModel):
 class IngestResponse(BaseModel):
     status: str
     message: str
+    job_id: Optional[str] = None
+
+class IngestJobStatus(BaseModel):
+    job_id: str
+    company_name: str
+    status: str
+    documents_loaded: int
+    chunks_embedded: int
+    chunks_skipped: int
+    chunks_upserted: int
+    throughput: float
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
 
 class ReceiptParseResponse(BaseModel):
     status: str
@@ -1,43 +1,264 @@
 import io
-import pytesseract
-from pdf2image import convert_from_bytes
+import asyncio
+import threading
+from collections import Counter
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pdf2image import convert_from_bytes, pdfinfo_from_bytes
 from PIL import Image
 import cv2
 import numpy as np
-from config.OCR import POPPLER_PATH
+from config.OCR import (
+    POPPLER_PATH,
+    OCR_MAX_WORKERS,
+    OCR_MAX_PENDING,
+    OCR_PDF_DPI,
+    OCR_PDF_WINDOW,
+    OCR_PDF_THREADS,
+    OCR_TARGET_DPI,
+    OCR_NOISE_SIGMA,
+    OCR_DESKEW_MIN_ANGLE,
+)
+from service.ocrBackends import OCRBackend, get_ocr_backend
+from service.processPool import worker_context
+
+# Images are measured on a copy at most this many pixels on a side.
+_ANALYSIS_SIDE = 1000
+# Typical glyph height of ~10pt receipt type, used to turn pixels into DPI.
+_GLYPH_HEIGHT_INCHES = 0.1
+_DESKEW_MAX_ANGLE = 15.0
+_MIN_CONTRAST = 0.35
+_MAX_UNEVEN_LIGHT = 0.25
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
 
 
 class OCRService:
+    def __init__(
+        self,
+        pdf_dpi: int = OCR_PDF_DPI,
+        pdf_window: int = OCR_PDF_WINDOW,
+        pdf_threads: int = OCR_PDF_THREADS,
+        backend: OCRBackend | None = None,
+        target_dpi: int = OCR_TARGET_DPI,
+        noise_sigma: float = OCR_NOISE_SIGMA,
+        deskew_min_angle: float = OCR_DESKEW_MIN_ANGLE,
+    ):
+        self.pdf_dpi = pdf_dpi
+        self.pdf_window = max(pdf_window, 1)
+        self.pdf_threads = max(pdf_threads, 1)
+        self._page_pool: ThreadPoolExecutor | None = None
+        self.target_dpi = target_dpi
+        self.noise_sigma = noise_sigma
+        self.deskew_min_angle = deskew_min_angle
+        # How often each preprocessing path was taken, e.g. "resize+otsu".
+        self.preprocess_paths: Counter = Counter()
+        self._paths_lock = threading.Lock()
+        # One engine handle per page thread.
+        self.backend = backend or get_ocr_backend(size=self.pdf_threads)
+
+    def _measure(self, gray: np.ndarray) -> dict:
+        """Cheap quality signals, all taken from reduced copies of the page."""
+        scale = min(1.0, _ANALYSIS_SIDE / max(gray.shape))
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+        # Median height of glyph-sized blobs, in full-size pixels.
+        _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        glyphs = heights[(heights >= 3) & (heights <= small.shape[0] * 0.1) & (widths <= heights * 3)]
+        glyph_height = float(np.median(glyphs)) / scale if len(glyphs) >= 20 else None
+
+        # Skew of the text lines: smear characters into lines and fit a box,
+        # on an even smaller copy since only the angle matters.
+        lines = cv2.dilate(cv2.resize(binary, None, fx=0.5, fy=0.5), np.ones((1, 9), np.uint8))
+        points = cv2.findNonZero(lines)
+        skew = 0.0
+        if points is not None and len(points) >= 100:
+            skew = cv2.minAreaRect(points)[-1]
+            if skew > 45:
+                skew -= 90
+            elif skew < -45:
+                skew += 90
+
+        # Noise sigma from the Immerkaer kernel response, on a strided (not
+        # averaged) sample so pixel noise is not smoothed away first. The
+        # median keeps text edges out of the estimate; for Gaussian noise
+        # the response has a standard deviation of 6 sigma.
+        step = -(-max(gray.shape) // _ANALYSIS_SIDE)
+        sample = gray[::step, ::step].astype(np.float32)
+        response = np.abs(cv2.filter2D(sample, -1, _NOISE_KERNEL))[1:-1, 1:-1]
+        noise = float(np.median(response)) / (0.6745 * 6)
 
-    def _processing(self, image: Image.Image) -> np.ndarray:
+        # Contrast between ink and paper, and how uneven the paper is once
+        # text is dilated away (shadows, flash falloff).
+        contrast = float(np.percentile(small, 98) - np.percentile(small, 2)) / 255
+        background = cv2.dilate(cv2.resize(small, (64, 64), interpolation=cv2.INTER_AREA), np.ones((5, 5), np.uint8))
+        uneven_light = float(np.percentile(background, 95) - np.percentile(background, 5)) / 255
+
+        return {
+            "glyph_height": glyph_height,
+            "skew": float(skew),
+            "noise": noise,
+            "contrast": contrast,
+            "uneven_light": uneven_light,
+        }
+
+    def _preprocess(self, image: Image.Image, dpi: int | None = None) -> tuple[np.ndarray, list[str]]:
         img = np.array(image)
-        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-        gray = cv2.medianBlur(gray, 3)
-        _, thresh = cv2.threshold(
-            gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-        )
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+        signals = self._measure(gray)
+        glyph_height = signals["glyph_height"]
+        steps = []
+
+        # Shrink to the target effective resolution, judged by how tall the
+        # glyphs are (or the render DPI when no text is found); never enlarge.
+        effective_dpi = glyph_height / _GLYPH_HEIGHT_INCHES if glyph_height else dpi
+        if effective_dpi and effective_dpi > self.target_dpi * 1.25:
+            scale = self.target_dpi / effective_dpi
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            glyph_height = glyph_height * scale if glyph_height else None
+            steps.append("resize")
+        else:
+            scale = 1.0
+
+        # Downsizing averages noise away too.
+        if signals["noise"] * scale > self.noise_sigma:
+            gray = cv2.medianBlur(gray, 3)
+            steps.append("blur")
+
+        if self.deskew_min_angle <= abs(signals["skew"]) <= _DESKEW_MAX_ANGLE:
+            height, width = gray.shape
+            rotation = cv2.getRotationMatrix2D((width / 2, height / 2), signals["skew"], 1.0)
+            gray = cv2.warpAffine(
+                gray, rotation, (width, height),
+                flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE,
+            )
+            steps.append("deskew")
+
+        if signals["contrast"] < _MIN_CONTRAST or signals["uneven_light"] > _MAX_UNEVEN_LIGHT:
+            # Neighbourhood of a couple of glyphs; must be odd.
+            block = max(int(glyph_height or 8) * 2 | 1, 15)
+            thresh = cv2.adaptiveThreshold(
+                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 15
+            )
+            steps.append("adaptive")
+        else:
+            _, thresh = cv2.threshold(
+                gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
+            )
+            steps.append("otsu")
+
+        return thresh, steps
+
+    def _processing(self, image: Image.Image, dpi: int | None = None) -> np.ndarray:
+        thresh, steps = self._preprocess(image, dpi)
+        with self._paths_lock:
+            self.preprocess_paths["+".join(steps)] += 1
         return thresh
 
-    def extract_text_from_image(self, image: Image.Image) -> str:
-        processed = self._processing(image)
-        return pytesseract.image_to_string(
-            Image.fromarray(processed),
-            config="--psm 6"
-        )
-    
+    def extract_text_from_image(self, image: Image.Image, dpi: int | None = None) -> str:
+        return self.backend.image_to_string(self._processing(image, dpi))
+
+    def _iter_pdf_windows(self, pdf_bytes: bytes):
+        info = pdfinfo_from_bytes(pdf_bytes, poppler_path=POPPLER_PATH)
+        page_count = int(info["Pages"])
+
+        for first_page in range(1, page_count + 1, self.pdf_window):
+            last_page = min(first_page + self.pdf_window - 1, page_count)
+            yield convert_from_bytes(
+                pdf_bytes,
+                dpi=self.pdf_dpi,
+                first_page=first_page,
+                last_page=last_page,
+                grayscale=True,
+                thread_count=min(self.pdf_threads, last_page - first_page + 1),
+                poppler_path=POPPLER_PATH,
+            )
+
     def extract_text_from_pdf_bytes(self, pdf_bytes: bytes) -> str:
-        pages = convert_from_bytes(pdf_bytes, poppler_path=POPPLER_PATH)
-        text = ""
-        for page in pages:
-            text += self.extract_text_from_image(page)
-        return text
+        if self._page_pool is None:
+            self._page_pool = ThreadPoolExecutor(max_workers=self.pdf_threads)
+
+        texts = []
+        # Only one window of rasterized pages is alive at a time; pages
+        # inside a window are OCR'd in parallel and map() keeps page order.
+        for pages in self._iter_pdf_windows(pdf_bytes):
+            texts.extend(self._page_pool.map(
+                partial(self.extract_text_from_image, dpi=self.pdf_dpi), pages
+            ))
+            del pages
+        return "".join(texts)
 
     def extract_text(self, file_bytes: bytes, content_type: str) -> str:
         if content_type.startswith("image/"):
-            image = Image.open(io.BytesIO(file_bytes)).convert("RGB")
+            image = Image.open(io.BytesIO(file_bytes)).convert("L")
             return self.extract_text_from_image(image)
 
         if content_type == "application/pdf":
             return self.extract_text_from_pdf_bytes(file_bytes)
 
         raise ValueError("Unsupported file type")
+
+
+_WORKER_OCR: OCRService | None = None
+
+
+def _init_worker() -> None:
+    global _WORKER_OCR
+    _WORKER_OCR = OCRService()
+
+
+def _extract_text(file_bytes: bytes, content_type: str) -> tuple[str, dict]:
+    # The preprocessing paths taken for this file go back with the text, so
+    # the parent process can count them; a worker runs one file at a time.
+    try:
+        text = _WORKER_OCR.extract_text(file_bytes=file_bytes, content_type=content_type)
+        return text, dict(_WORKER_OCR.preprocess_paths)
+    finally:
+        _WORKER_OCR.preprocess_paths.clear()
+
+
+class OCRExecutor:
+    def __init__(
+        self,
+        max_workers: int = OCR_MAX_WORKERS,
+        max_pending: int = OCR_MAX_PENDING,
+    ):
+        self.max_workers = max_workers
+        self.pool = self._new_pool()
+        # Preprocessing paths taken across all workers, e.g. "resize+otsu".
+        self.preprocess_paths: Counter = Counter()
+        # Callers beyond the running + queued slots wait here instead of
+        # piling unbounded work (and file bytes) into the pool's queue.
+        self.slots = asyncio.Semaphore(max_workers + max_pending)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            mp_context=worker_context(),
+        )
+
+    async def extract_text(self, file_bytes: bytes, content_type: str) -> str:
+        async with self.slots:
+            pool = self.pool
+            loop = asyncio.get_running_loop()
+            try:
+                text, paths = await loop.run_in_executor(
+                    pool, _extract_text, file_bytes, content_type
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); the pool refuses
+                # all further work, so later requests get a fresh one.
+                if self.pool is pool:
+                    self.pool = self._new_pool()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        self.preprocess_paths.update(paths)
+        return text
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,120 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config.qdrant import tenant_id_for
+from config.cache import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_TTL,
+    ANSWER_CACHE_SIMILARITY,
+)
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl: float = ANSWER_CACHE_TTL,
+        similarity: float = ANSWER_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._companies: dict[str, OrderedDict[str, dict]] = {}
+        # Bumped by invalidate(); an answer computed from documents read
+        # before an ingest finished is not stored afterwards.
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(question: str) -> str:
+        return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", question.lower())).strip()
+
+    def _expire(self, entries: OrderedDict[str, dict]) -> None:
+        now = time.monotonic()
+        expired = [key for key, entry in entries.items() if entry["expires_at"] <= now]
+        for key in expired:
+            del entries[key]
+
+    def get(
+        self,
+        company_name: str,
+        question: str,
+        embedding: list[float] | None = None,
+    ) -> dict | None:
+        key = self._normalize(question)
+
+        with self._lock:
+            entries = self._companies.get(tenant_id_for(company_name))
+            if not entries:
+                return None
+
+            self._expire(entries)
+
+            if key not in entries and embedding is not None and entries:
+                keys = list(entries.keys())
+                vectors = np.stack([entries[k]["embedding"] for k in keys])
+                query = np.asarray(embedding, dtype=np.float32)
+                scores = vectors @ query / (
+                    np.linalg.norm(vectors, axis=1) * np.linalg.norm(query) + 1e-12
+                )
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity:
+                    key = keys[best]
+
+            entry = entries.get(key)
+            if entry is None:
+                return None
+
+            entries.move_to_end(key)
+            return entry["result"]
+
+    def generation(self, company_name: str) -> int:
+        with self._lock:
+            return self._generations.get(tenant_id_for(company_name), 0)
+
+    def put(
+        self,
+        company_name: str,
+        question: str,
+        embedding: list[float],
+        result: dict,
+        generation: int | None = None,
+    ) -> None:
+        key = self._normalize(question)
+        tenant_id = tenant_id_for(company_name)
+
+        with self._lock:
+            if generation is not None and generation != self._generations.get(tenant_id, 0):
+                return
+
+            entries = self._companies.setdefault(tenant_id, OrderedDict())
+            entries[key] = {
+                "result": result,
+                "embedding": np.asarray(embedding, dtype=np.float32),
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            entries.move_to_end(key)
+
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def invalidate(self, company_name: str) -> None:
+        tenant_id = tenant_id_for(company_name)
+
+        with self._lock:
+            self._companies.pop(tenant_id, None)
+            self._generations[tenant_id] = self._generations.get(tenant_id, 0) + 1
+
+
+_ANSWER_CACHE: AnswerCache | None = None
+
+
+def get_answer_cache() -> AnswerCache:
+    global _ANSWER_CACHE
+    if _ANSWER_CACHE is None:
+        _ANSWER_CACHE = AnswerCache()
+    return _ANSWER_CACHE
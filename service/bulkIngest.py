@@ -0,0 +1,238 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+from langchain_core.documents import Document
+
+from config.ingest import (
+    DATA_PATH,
+    INGEST_PARSE_WORKERS,
+    INGEST_BULK_BATCH_SIZE,
+    INGEST_UPSERT_WORKERS,
+    INGEST_MAX_PENDING_BATCHES,
+    INGEST_MANIFEST_PATH,
+)
+from config.qdrant import get_company_vectorstore, forget_collection
+from service.documentLoaders import SUPPORTED_SUFFIXES
+from service.ingest import Ingest
+from service.processPool import worker_context
+
+
+# Each parse worker process keeps its own Ingest (and text splitter).
+_WORKER_INGEST: Ingest | None = None
+
+
+def _init_worker() -> None:
+    global _WORKER_INGEST
+    _WORKER_INGEST = Ingest()
+
+
+def _parse_file(path: str, source: str) -> tuple[int, list[Document], str | None]:
+    # A file that cannot be read comes back as an error message instead of
+    # raising, so one corrupt file does not stop the rest of the run.
+    try:
+        with open(path, "rb") as file:
+            documents = list(_WORKER_INGEST._iter_documents([{"filename": source, "file": file}]))
+        return len(documents), list(_WORKER_INGEST._iter_chunks(documents)), None
+    except Exception as error:
+        return 0, [], f"{type(error).__name__}: {error}"
+
+
+class IngestManifest:
+    """Append-only record of the files whose chunks are all in Qdrant.
+
+    A file is keyed by company and path and remembered with its size and
+    mtime, so a file that changed since it was loaded is loaded again.
+    """
+
+    def __init__(self, path: str = INGEST_MANIFEST_PATH):
+        self.path = path
+        self.done: dict[str, str] = {}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as manifest:
+                for line in manifest:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn last line from an interrupted run.
+                        continue
+                    self.done[entry["key"]] = entry["fingerprint"]
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._file = open(path, "a+", encoding="utf-8")
+        if self._file.tell() > 0:
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+
+    def is_done(self, key: str, fingerprint: str) -> bool:
+        return self.done.get(key) == fingerprint
+
+    def mark_done(self, key: str, fingerprint: str) -> None:
+        self.done[key] = fingerprint
+        self._file.write(json.dumps({"key": key, "fingerprint": fingerprint}) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class BulkIngest:
+    """Loads DATA_PATH into Qdrant without the HTTP server.
+
+    DATA_PATH holds one subdirectory per company. Files are parsed and
+    chunked in a process pool, then fed through the same embed / upsert
+    pipeline as uploads, in larger batches.
+    """
+
+    def __init__(
+        self,
+        data_path: str = DATA_PATH,
+        parse_workers: int = INGEST_PARSE_WORKERS,
+        batch_size: int = INGEST_BULK_BATCH_SIZE,
+        upsert_workers: int = INGEST_UPSERT_WORKERS,
+        max_pending_batches: int = INGEST_MAX_PENDING_BATCHES,
+        manifest_path: str = INGEST_MANIFEST_PATH,
+    ):
+        self.data_path = data_path
+        self.parse_workers = parse_workers
+        self.manifest_path = manifest_path
+        self.ingest = Ingest(
+            batch_size=batch_size,
+            upsert_workers=upsert_workers,
+            max_pending_batches=max_pending_batches,
+        )
+
+    def companies(self) -> list[str]:
+        return sorted(
+            entry.name for entry in os.scandir(self.data_path)
+            if entry.is_dir() and not entry.name.startswith(".")
+        )
+
+    def _iter_files(self, company_name: str) -> Iterator[tuple[str, str, str]]:
+        root = os.path.join(self.data_path, company_name)
+
+        for directory, subdirectories, filenames in os.walk(root):
+            subdirectories.sort()
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[-1].lower() not in SUPPORTED_SUFFIXES:
+                    continue
+
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                source = os.path.relpath(path, root).replace(os.sep, "/")
+                yield path, source, f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _iter_parsed(
+        self,
+        pool: ProcessPoolExecutor,
+        files: Iterable[tuple[str, str, str]],
+    ) -> Iterator[tuple[str, str, int, list[Document], str | None]]:
+        # A bounded window of files is parsed ahead, and results come back in
+        # submission order so each file's chunks reach the pipeline together.
+        window = deque()
+
+        for path, source, fingerprint in files:
+            window.append((source, fingerprint, pool.submit(_parse_file, path, source)))
+            if len(window) >= self.parse_workers * 2:
+                source, fingerprint, future = window.popleft()
+                yield source, fingerprint, *future.result()
+
+        while window:
+            source, fingerprint, future = window.popleft()
+            yield source, fingerprint, *future.result()
+
+    def _ingest_company(
+        self,
+        pool: ProcessPoolExecutor,
+        manifest: IngestManifest,
+        company_name: str,
+        progress: Callable[[str, dict], None] | None,
+    ) -> dict:
+        vectorstore = get_company_vectorstore(company_name)
+        stats = {
+            "files_loaded": 0,
+            "files_skipped": 0,
+            "documents_loaded": 0,
+            "chunks_embedded": 0,
+            "chunks_skipped": 0,
+            "chunks_upserted": 0,
+            "files_failed": 0,
+            # source -> error, for files that could not be parsed. They are
+            # not marked done, so a later run tries them again.
+            "errors": {},
+        }
+        # Fingerprints of files read but not yet confirmed written.
+        in_flight: dict[str, str] = {}
+
+        def pending_files() -> Iterator[tuple[str, str, str]]:
+            for path, source, fingerprint in self._iter_files(company_name):
+                if manifest.is_done(f"{company_name}/{source}", fingerprint):
+                    stats["files_skipped"] += 1
+                    continue
+                yield path, source, fingerprint
+
+        def chunks() -> Iterator[Document]:
+            for source, fingerprint, documents, file_chunks, error in self._iter_parsed(pool, pending_files()):
+                if error is not None:
+                    stats["files_failed"] += 1
+                    stats["errors"][source] = error
+                    continue
+                stats["documents_loaded"] += documents
+                if not file_chunks:
+                    manifest.mark_done(f"{company_name}/{source}", fingerprint)
+                    stats["files_loaded"] += 1
+                    continue
+                in_flight[source] = fingerprint
+                yield from file_chunks
+
+        def source_done(source: str) -> None:
+            manifest.mark_done(f"{company_name}/{source}", in_flight.pop(source))
+            stats["files_loaded"] += 1
+
+        try:
+            self.ingest._run_pipeline(
+                vectorstore,
+                company_name,
+                chunks(),
+                stats,
+                (lambda current: progress(company_name, current)) if progress else None,
+                on_source_done=source_done,
+            )
+        except Exception:
+            forget_collection(vectorstore.collection_name)
+            raise
+
+        return stats
+
+    def run(
+        self,
+        companies: list[str] | None = None,
+        restart: bool = False,
+        progress: Callable[[str, dict], None] | None = None,
+    ) -> dict[str, dict]:
+        if restart and os.path.exists(self.manifest_path):
+            os.unlink(self.manifest_path)
+
+        manifest = IngestManifest(self.manifest_path)
+        results = {}
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                initializer=_init_worker,
+                mp_context=worker_context(),
+            ) as pool:
+                for company_name in companies or self.companies():
+                    results[company_name] = self._ingest_company(
+                        pool, manifest, company_name, progress
+                    )
+        finally:
+            manifest.close()
+
+        return results
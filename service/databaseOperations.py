@@ -1,42 +1,81 @@
+import asyncio
+from sqlalchemy import insert
 from schemas.DataModels import Receipt, ReceiptItem
 from datetime import datetime
-from config.database import SessionLocal,init_db
+from config.database import SessionLocal, DB_ASYNC, get_async_sessionmaker, init_db
 
 
 class DatabaseOperations:
-    def __init__(self):
+    def __init__(self, use_async: bool = DB_ASYNC):
         init_db()
-        self.db = SessionLocal()
+        self.use_async = use_async
 
-    def save_receipt(self, data: dict)->int:
+    def _receipt(self, data: dict) -> Receipt:
         try:
             receipt_date = datetime.strptime(data.get("receipt_date", ""), "%Y-%m-%d").date()
         except (ValueError, TypeError):
             receipt_date = None
 
-        receipt = Receipt(
+        return Receipt(
             merchant_name=data.get("merchant_name"),
             receipt_date=receipt_date,
             total_amount=data.get("total_amount"),
             tax_amount=data.get("tax_amount"),
             currency=data.get("currency")
         )
-        self.db.add(receipt)
-        self.db.commit()
-        self.db.refresh(receipt)
-
-        for item in data["items"]:
-            db_item = ReceiptItem(
-                receipt_id=receipt.id,
-                item_name=item["item_name"],
-                quantity=item["quantity"],
-                unit_price=item["unit_price"],
-                total_price=item["total_price"]
-            )
-            self.db.add(db_item)
-
-        self.db.commit()
-        return receipt.id
-    
-    def __del__(self):
-        self.db.close()
+
+    def _item_rows(self, receipts: list[Receipt], batch: list[dict]) -> list[dict]:
+        return [
+            {
+                "receipt_id": receipt.id,
+                "item_name": item.get("item_name"),
+                "quantity": item.get("quantity"),
+                "unit_price": item.get("unit_price"),
+                "total_price": item.get("total_price"),
+            }
+            for receipt, data in zip(receipts, batch)
+            for item in data.get("items") or []
+        ]
+
+    def save_receipts(self, batch: list[dict]) -> list[int]:
+        if not batch:
+            return []
+
+        with SessionLocal.begin() as db:
+            receipts = [self._receipt(data) for data in batch]
+            db.add_all(receipts)
+            db.flush()
+
+            item_rows = self._item_rows(receipts, batch)
+            if item_rows:
+                db.execute(insert(ReceiptItem), item_rows)
+
+            receipt_ids = [receipt.id for receipt in receipts]
+
+        return receipt_ids
+
+    def save_receipt(self, data: dict)->int:
+        return self.save_receipts([data])[0]
+
+    async def asave_receipts(self, batch: list[dict]) -> list[int]:
+        if not self.use_async:
+            return await asyncio.to_thread(self.save_receipts, batch)
+
+        if not batch:
+            return []
+
+        async with get_async_sessionmaker().begin() as db:
+            receipts = [self._receipt(data) for data in batch]
+            db.add_all(receipts)
+            await db.flush()
+
+            item_rows = self._item_rows(receipts, batch)
+            if item_rows:
+                await db.execute(insert(ReceiptItem), item_rows)
+
+            receipt_ids = [receipt.id for receipt in receipts]
+
+        return receipt_ids
+
+    async def asave_receipt(self, data: dict) -> int:
+        return (await self.asave_receipts([data]))[0]
@@ -0,0 +1,99 @@
+import json
+from typing import BinaryIO, Callable, Iterator
+
+import pandas as pd
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+from config.ingest import INGEST_CSV_CHUNK_ROWS
+
+
+# Loaders read straight from the upload stream (or bytes), never from a
+# temporary copy on disk. Each yields documents as it goes so the chunker
+# can start before the whole file has been parsed.
+
+def _decode(stream: BinaryIO) -> str:
+    return stream.read().decode("utf-8", errors="replace")
+
+
+def iter_pdf(stream: BinaryIO) -> Iterator[Document]:
+    reader = PdfReader(stream)
+    total_pages = len(reader.pages)
+
+    # Pages are parsed one at a time as the generator is advanced.
+    for number, page in enumerate(reader.pages):
+        yield Document(
+            page_content=page.extract_text() or "",
+            metadata={"page": number, "total_pages": total_pages},
+        )
+
+
+def iter_csv(stream: BinaryIO, sep: str = ",") -> Iterator[Document]:
+    try:
+        frames = pd.read_csv(
+            stream,
+            sep=sep,
+            dtype=str,
+            keep_default_na=False,
+            # Rows with a trailing delimiter must not shift the first column
+            # into the index.
+            index_col=False,
+            encoding_errors="replace",
+            chunksize=INGEST_CSV_CHUNK_ROWS,
+        )
+        row = 0
+        for frame in frames:
+            # Builds "column: value" lines for a whole block of rows at once.
+            columns = [str(column).strip() for column in frame.columns]
+            content = columns[0] + ": " + frame.iloc[:, 0].str.strip()
+            for index, column in enumerate(columns[1:], start=1):
+                content = content + "\n" + column + ": " + frame.iloc[:, index].str.strip()
+
+            for text in content.tolist():
+                yield Document(page_content=text, metadata={"row": row})
+                row += 1
+
+    except pd.errors.EmptyDataError:
+        return
+
+
+def iter_tsv(stream: BinaryIO) -> Iterator[Document]:
+    return iter_csv(stream, sep="\t")
+
+
+def iter_text(stream: BinaryIO) -> Iterator[Document]:
+    yield Document(page_content=_decode(stream), metadata={})
+
+
+def iter_json(stream: BinaryIO) -> Iterator[Document]:
+    data = json.loads(_decode(stream) or "null")
+    records = data if isinstance(data, list) else [data]
+
+    for row, record in enumerate(records):
+        if record is None:
+            continue
+        yield Document(
+            page_content=record if isinstance(record, str) else json.dumps(record, ensure_ascii=False),
+            metadata={"row": row},
+        )
+
+
+def iter_jsonl(stream: BinaryIO) -> Iterator[Document]:
+    for row, line in enumerate(stream):
+        line = line.decode("utf-8", errors="replace").strip()
+        if line:
+            yield Document(page_content=line, metadata={"row": row})
+
+
+LOADERS: dict[str, Callable[[BinaryIO], Iterator[Document]]] = {
+    ".pdf": iter_pdf,
+    ".csv": iter_csv,
+    ".tsv": iter_tsv,
+    ".txt": iter_text,
+    ".md": iter_text,
+    ".markdown": iter_text,
+    ".json": iter_json,
+    ".jsonl": iter_jsonl,
+}
+
+SUPPORTED_SUFFIXES = tuple(LOADERS)
@@ -0,0 +1,105 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+
+
+class QueryBatcher:
+    def __init__(self, embeddings: Embeddings, max_wait_ms: float, max_batch_size: int):
+        self.embeddings = embeddings
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max(max_batch_size, 1)
+        self._queue: queue.Queue[tuple[str, Future]] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._batch_sizes: Counter[int] = Counter()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="query-embedding-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_started()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> list[float]:
+        return self.submit(text).result()
+
+    async def aembed(self, text: str) -> list[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect(self) -> list[tuple[str, Future]]:
+        batch = []
+        deadline = None
+
+        while len(batch) < self.max_batch_size:
+            if deadline is None:
+                item = self._queue.get()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            # Callers that were cancelled while queued (e.g. a client that
+            # disconnected) are dropped here rather than embedded.
+            if not item[1].set_running_or_notify_cancel():
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.max_wait
+
+        return batch
+
+    def _run(self) -> None:
+        # Nothing may end this loop: it is the only thread serving queries.
+        while True:
+            try:
+                self._embed_batch(self._collect())
+            except Exception:
+                continue
+
+    def _embed_batch(self, batch: list[tuple[str, Future]]) -> None:
+        self._batch_sizes[len(batch)] += 1
+
+        try:
+            vectors = self.embeddings.embed_documents([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> dict:
+        sizes = dict(self._batch_sizes)
+        batches = sum(sizes.values())
+        queries = sum(size * count for size, count in sizes.items())
+
+        return {
+            "batches": batches,
+            "queries": queries,
+            "mean_batch_size": round(queries / batches, 2) if batches else 0.0,
+            "max_batch_size": max(sizes, default=0),
+            "batch_sizes": dict(sorted(sizes.items())),
+        }
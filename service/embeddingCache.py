@@ -0,0 +1,177 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config.cache import EMBEDDING_CACHE_DIR, EMBEDDING_QUERY_CACHE_SIZE
+from service.embeddingBatcher import QueryBatcher
+
+
+class EmbeddingStore:
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self._lock = threading.Lock()
+        self._mmap: np.ndarray | None = None
+        self._db = sqlite3.connect(
+            os.path.join(path, "index.sqlite"),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, row INTEGER)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        found = self._db.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim: int | None = found[0] if found else None
+
+    def _rows(self, rows: list[int]) -> np.ndarray:
+        if self._mmap is None or max(rows) >= len(self._mmap):
+            count = os.path.getsize(self.vectors_path) // (self.dim * 4)
+            self._mmap = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim)
+            )
+        return np.array(self._mmap[rows])
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        if self.dim is None or not keys:
+            return {}
+
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                found.update(self._db.execute(
+                    f"SELECT key, row FROM vectors WHERE key IN ({','.join('?' * len(part))})",
+                    part,
+                ).fetchall())
+
+            if not found:
+                return {}
+
+            vectors = self._rows(list(found.values()))
+
+        return dict(zip(found.keys(), vectors))
+
+    def put_many(self, keys: list[str], vectors: np.ndarray) -> None:
+        if not keys:
+            return
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+        with self._lock:
+            # The write lock of the index also serializes appends from other
+            # processes sharing this cache directory.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (self.dim,))
+
+                with open(self.vectors_path, "ab") as out:
+                    first_row = out.tell() // (self.dim * 4)
+                    # Drop any partial row left by an interrupted write so the
+                    # new rows start on a row boundary.
+                    out.truncate(first_row * self.dim * 4)
+                    out.write(vectors.tobytes())
+
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO vectors VALUES (?, ?)",
+                    [(key, first_row + offset) for offset, key in enumerate(keys)],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache_dir: str = EMBEDDING_CACHE_DIR,
+        query_cache_size: int = EMBEDDING_QUERY_CACHE_SIZE,
+        query_batcher: QueryBatcher | None = None,
+    ):
+        self.embeddings = embeddings
+        self.query_batcher = query_batcher
+        self.model_name = model_name
+        self.store = EmbeddingStore(
+            os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        )
+        self.query_cache_size = query_cache_size
+        self._queries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.query_hits = 0
+        self.query_misses = 0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self._key(text) for text in texts]
+        found = self.store.get_many(keys)
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = np.asarray(
+                self.embeddings.embed_documents(list(missing.values())),
+                dtype=np.float32,
+            )
+            self.store.put_many(list(missing.keys()), vectors)
+            found.update(zip(missing.keys(), vectors))
+
+        return [found[key].tolist() for key in keys]
+
+    def _cached_query(self, key: str) -> list[float] | None:
+        with self._lock:
+            vector = self._queries.get(key)
+            if vector is None:
+                self.query_misses += 1
+                return None
+
+            self.query_hits += 1
+            self._queries.move_to_end(key)
+            return vector.tolist()
+
+    def _remember_query(self, key: str, vector: list[float]) -> list[float]:
+        with self._lock:
+            self._queries[key] = np.asarray(vector, dtype=np.float32)
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+
+        return vector
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._cached_query(key)
+        if vector is not None:
+            return vector
+
+        if self.query_batcher is not None:
+            return self._remember_query(key, self.query_batcher.embed(text))
+        return self._remember_query(key, self.embeddings.embed_query(text))
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._cached_query(key)
+        if vector is not None:
+            return vector
+
+        if self.query_batcher is not None:
+            return self._remember_query(key, await self.query_batcher.aembed(text))
+        return self._remember_query(key, await self.embeddings.aembed_query(text))
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "query_cache_hits": self.query_hits,
+            "query_cache_misses": self.query_misses,
+            "query_batching": self.query_batcher.stats() if self.query_batcher else None,
+        }
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import re
+import time
+from collections import deque
+
+
+class _FakeResponse:
+    def __init__(self, parsed: dict | list):
+        self.parsed = parsed
+        self.text = json.dumps(parsed)
+
+
+class _FakeModels:
+    def __init__(self, latency: float, failures: deque, calls: list):
+        self.latency = latency
+        self.failures = failures
+        self.calls = calls
+
+    def _receipt(self, ocr_text: str) -> dict:
+        lines = [line.strip() for line in ocr_text.splitlines() if line.strip()]
+        return {
+            "merchant_name": lines[0] if lines else None,
+            "receipt_date": None,
+            "currency": None,
+            "tax_amount": None,
+            "total_amount": None,
+            "items": [],
+        }
+
+    def _respond(self, contents: str) -> _FakeResponse:
+        self.calls.append(contents)
+        if self.failures:
+            raise self.failures.popleft()
+
+        if "RECEIPTS:" in contents:
+            parts = re.split(r"^=== RECEIPT (\d+) ===$", contents.split("RECEIPTS:", 1)[1], flags=re.M)
+            return _FakeResponse([
+                {"receipt_index": int(index), **self._receipt(ocr_text)}
+                for index, ocr_text in zip(parts[1::2], parts[2::2])
+            ])
+
+        return _FakeResponse(self._receipt(contents.rsplit("OCR TEXT:", 1)[-1]))
+
+    def generate_content(self, *, model, contents, config=None) -> _FakeResponse:
+        time.sleep(self.latency)
+        return self._respond(contents)
+
+
+class _FakeAsyncModels(_FakeModels):
+    async def generate_content(self, *, model, contents, config=None) -> _FakeResponse:
+        await asyncio.sleep(self.latency)
+        return self._respond(contents)
+
+
+class _FakeAio:
+    def __init__(self, models: _FakeAsyncModels):
+        self.models = models
+
+
+class FakeGenaiClient:
+    """Offline stand-in for genai.Client.
+
+    Enabled with GENAI_FAKE_LATENCY=<seconds>, so receipt parsing throughput
+    can be measured without calling Gemini. Answers single and batched
+    prompts with a receipt named after the first line of its text.
+
+    ``failures`` are raised, in order, by the first calls (e.g. a 429
+    APIError to exercise the retries); ``calls`` records every prompt.
+    """
+
+    def __init__(self, latency: float = 0.5, failures: list[Exception] = ()):
+        self.calls: list[str] = []
+        queued = deque(failures)
+        self.models = _FakeModels(latency, queued, self.calls)
+        self.aio = _FakeAio(_FakeAsyncModels(latency, queued, self.calls))
@@ -1,80 +1,316 @@
+import io
 import os
-import tempfile
-from typing import List
+import hashlib
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, Iterable, Iterator, List
 
 from fastapi import UploadFile
-from langchain_community.document_loaders import (
-    PyPDFLoader, CSVLoader, TextLoader
-)
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from config.qdrant import get_company_vectorstore
+from qdrant_client.models import (
+    PointStruct, Filter, FieldCondition, MatchValue, HasIdCondition
+)
+from config.qdrant import (
+    get_company_vectorstore,
+    forget_collection,
+    has_sparse_vectors,
+    tenant_id_for,
+    QDRANT_MULTITENANT,
+    QDRANT_SPARSE_VECTOR_NAME,
+)
+from service.answerCache import get_answer_cache
+from service.documentLoaders import LOADERS
+from service.sparseEncoder import get_sparse_encoder
+from config.ingest import (
+    INGEST_BATCH_SIZE,
+    INGEST_UPSERT_WORKERS,
+    INGEST_MAX_PENDING_BATCHES,
+)
 
 
 class Ingest:
-    def __init__(self):
-        pass
-
-    def _load_documents(self, files: list[dict]) -> list:
-        documents = []
+    def __init__(
+        self,
+        batch_size: int = INGEST_BATCH_SIZE,
+        upsert_workers: int = INGEST_UPSERT_WORKERS,
+        max_pending_batches: int = INGEST_MAX_PENDING_BATCHES,
+    ):
+        self.batch_size = batch_size
+        self.upsert_workers = upsert_workers
+        self.max_pending_batches = max_pending_batches
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=500,
+            chunk_overlap=100,
+        )
 
-        for file in files:   
+    def _iter_documents(self, files: Iterable[dict]) -> Iterator[Document]:
+        for file in files:
             filename = file["filename"]
-            content = file["content"]
             suffix = os.path.splitext(filename)[-1].lower()
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(content)
-                tmp_path = tmp.name
+            loader = LOADERS.get(suffix)
+            if loader is None:
+                continue
 
-            try:
-                if suffix == ".pdf":
-                    loader = PyPDFLoader(tmp_path)
-                elif suffix == ".csv":
-                    loader = CSVLoader(tmp_path)
-                elif suffix == ".txt":
-                    loader = TextLoader(tmp_path)
-                else:
-                    continue  
+            # Uploads arrive as a spooled stream; the bulk loader and
+            # queued jobs pass open files; callers may also pass bytes.
+            stream = file["file"] if "file" in file else io.BytesIO(file["content"])
+            if stream.seekable():
+                stream.seek(0)
 
-                docs = loader.load()
+            for doc in loader(stream):
+                doc.metadata.update({
+                    "source": filename,
+                    "doc_type": suffix.replace(".", ""),
+                })
+                yield doc
 
-                for doc in docs:
-                    doc.metadata.update({
-                        "source": filename,
-                        "doc_type": suffix.replace(".", ""),
-                    })
-                    documents.append(doc)
+    def _load_documents(self, files: list[dict]) -> list:
+        return list(self._iter_documents(files))
 
-            finally:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+    def _iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        chunk_ids: dict[str, int] = {}
 
-        return documents
+        for document in documents:
+            source = document.metadata.get("source")
+            for chunk in self.splitter.split_documents([document]):
+                chunk_id = chunk_ids.get(source, 0)
+                chunk_ids[source] = chunk_id + 1
 
+                chunk.metadata["chunk_id"] = chunk_id
+                chunk.metadata["content_hash"] = hashlib.sha256(
+                    chunk.page_content.encode("utf-8")
+                ).hexdigest()
+                yield chunk
 
     def _chunk(self, documents: list) -> list:
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=100,
+        return list(self._iter_chunks(documents))
+
+    def _iter_batches(self, chunks: Iterable[Document]) -> Iterator[list[Document]]:
+        batch = []
+
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def _point_id(self, company_name: str, chunk: Document) -> str:
+        # Keyed by tenant id so "Acme Co" and "acme_co", which share a
+        # collection and a tenant, produce the same point ids.
+        key = "/".join([
+            tenant_id_for(company_name),
+            str(chunk.metadata.get("source")),
+            chunk.metadata["content_hash"],
+        ])
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
+    def _new_chunks(
+        self,
+        vectorstore: QdrantVectorStore,
+        ids: list[str],
+        batch: list[Document],
+    ) -> list[tuple[str, Document]]:
+        existing = {
+            point.id
+            for point in vectorstore.client.retrieve(
+                collection_name=vectorstore.collection_name,
+                ids=ids,
+                with_payload=False,
+                with_vectors=False,
+            )
+        }
+        return [
+            (point_id, chunk)
+            for point_id, chunk in dict(zip(ids, batch)).items()
+            if point_id not in existing
+        ]
+
+    def _embed(
+        self,
+        vectorstore: QdrantVectorStore,
+        batch: list[tuple[str, Document]],
+    ) -> list[PointStruct]:
+        texts = [chunk.page_content for _, chunk in batch]
+        vectors = [
+            {vectorstore.vector_name: vector}
+            for vector in vectorstore.embeddings.embed_documents(texts)
+        ]
+
+        # Sparse vectors are only computed for chunks that are actually new,
+        # and only when the collection was created with a slot for them.
+        if has_sparse_vectors(vectorstore.collection_name):
+            for vector, sparse in zip(vectors, get_sparse_encoder().encode_documents(texts)):
+                vector[QDRANT_SPARSE_VECTOR_NAME] = sparse
+
+        return [
+            PointStruct(
+                id=point_id,
+                vector=vector,
+                payload={
+                    vectorstore.content_payload_key: chunk.page_content,
+                    vectorstore.metadata_payload_key: chunk.metadata,
+                },
+            )
+            for (point_id, chunk), vector in zip(batch, vectors)
+        ]
+
+    def _upsert(self, vectorstore: QdrantVectorStore, points: list[PointStruct]) -> int:
+        vectorstore.client.upsert(
+            collection_name=vectorstore.collection_name,
+            points=points,
         )
+        return len(points)
+
+    def _submit(self, pool: ThreadPoolExecutor | None, fn: Callable, *args) -> Future:
+        if pool is not None:
+            return pool.submit(fn, *args)
+
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def _delete_stale(
+        self,
+        vectorstore: QdrantVectorStore,
+        company_name: str,
+        source: str,
+        ids: set[str],
+    ) -> None:
+        must = [
+            FieldCondition(
+                key=f"{vectorstore.metadata_payload_key}.source",
+                match=MatchValue(value=source),
+            )
+        ]
+        if QDRANT_MULTITENANT:
+            must.append(FieldCondition(
+                key=f"{vectorstore.metadata_payload_key}.company",
+                match=MatchValue(value=tenant_id_for(company_name)),
+            ))
+
+        vectorstore.client.delete(
+            collection_name=vectorstore.collection_name,
+            points_selector=Filter(
+                must=must,
+                must_not=[HasIdCondition(has_id=list(ids))],
+            ),
+        )
+
+    def _run_pipeline(
+        self,
+        vectorstore: QdrantVectorStore,
+        company_name: str,
+        chunks: Iterable[Document],
+        stats: dict,
+        progress: Callable[[dict], None] | None,
+        on_source_done: Callable[[str], None] | None = None,
+    ) -> None:
+        source, source_ids = None, set()
+        tenant_id = tenant_id_for(company_name)
+
+        # Embedding happens on this thread while earlier batches are being
+        # upserted by the pool; at most max_pending_batches are held in memory.
+        # Point ids are derived from the chunk content, so chunks already in
+        # the collection are skipped, and once a source has been fully read
+        # its points that were not produced this time are deleted.
+        with (
+            ThreadPoolExecutor(max_workers=self.upsert_workers)
+            if self.upsert_workers > 0 else nullcontext()
+        ) as pool:
+            # Entries are (future, source); a source is set on its stale-point
+            # delete, and since futures are drained in submission order, every
+            # write for that source has landed once that entry is drained.
+            pending = deque()
 
-        chunks = splitter.split_documents(documents)
+            def drain() -> None:
+                future, done_source = pending.popleft()
+                stats["chunks_upserted"] += future.result() or 0
+                if done_source is not None and on_source_done:
+                    on_source_done(done_source)
 
-        for i, chunk in enumerate(chunks):
-            chunk.metadata["chunk_id"] = i
+            for batch in self._iter_batches(chunks):
+                ids = []
+                finished = []
+                for chunk in batch:
+                    chunk.metadata["company"] = tenant_id
+                    if chunk.metadata.get("source") != source:
+                        if source is not None:
+                            finished.append((source, source_ids))
+                        source, source_ids = chunk.metadata.get("source"), set()
+                    ids.append(self._point_id(company_name, chunk))
+                    source_ids.add(ids[-1])
 
-        return chunks
+                new_chunks = self._new_chunks(vectorstore, ids, batch)
+                stats["chunks_skipped"] += len(batch) - len(new_chunks)
+
+                if new_chunks:
+                    points = self._embed(vectorstore, new_chunks)
+                    stats["chunks_embedded"] += len(points)
+                    pending.append((self._submit(pool, self._upsert, vectorstore, points), None))
+
+                # Sources that ended in this batch are queued behind its
+                # upsert, which may still hold their last chunks.
+                for done_source, done_ids in finished:
+                    pending.append((self._submit(
+                        pool, self._delete_stale, vectorstore, company_name, done_source, done_ids
+                    ), done_source))
+
+                while len(pending) > self.max_pending_batches or (pending and pending[0][0].done()):
+                    drain()
+
+                if progress:
+                    progress(dict(stats))
+
+            if source is not None:
+                pending.append((self._submit(
+                    pool, self._delete_stale, vectorstore, company_name, source, source_ids
+                ), source))
+
+            while pending:
+                drain()
 
     def ingest_company_data(
     self,
     company_name: str,
-    files: list[dict],
+    files: Iterable[dict],
+    progress: Callable[[dict], None] | None = None,
 ) -> int:
-        documents = self._load_documents(files)
-        chunks = self._chunk(documents)
-
         vectorstore = get_company_vectorstore(company_name)
-        vectorstore.add_documents(chunks)
+        stats = {
+            "documents_loaded": 0,
+            "chunks_embedded": 0,
+            "chunks_skipped": 0,
+            "chunks_upserted": 0,
+        }
+
+        def documents() -> Iterator[Document]:
+            for document in self._iter_documents(files):
+                stats["documents_loaded"] += 1
+                yield document
+
+        try:
+            self._run_pipeline(
+                vectorstore, company_name, self._iter_chunks(documents()), stats, progress
+            )
+        except Exception:
+            # The collection may have been dropped behind our back; look it
+            # up again next time.
+            forget_collection(vectorstore.collection_name)
+            raise
+        finally:
+            # Answers cached for this company may cite chunks that were just
+            # replaced or miss ones that were just added.
+            get_answer_cache().invalidate(company_name)
 
-        return len(chunks)
+        if progress:
+            progress(dict(stats))
 
+        return stats["chunks_upserted"]
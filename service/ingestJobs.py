@@ -0,0 +1,132 @@
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select
+
+from schemas.DataModels import IngestJob
+from config.database import SessionLocal, init_db
+from config.ingest import INGEST_JOB_WORKERS, INGEST_JOB_DIR
+from service.ingest import Ingest
+
+
+class IngestJobManager:
+    def __init__(
+        self,
+        ingest: Ingest,
+        workers: int = INGEST_JOB_WORKERS,
+        job_dir: str = INGEST_JOB_DIR,
+    ):
+        init_db()
+        self.ingest = ingest
+        self.job_dir = job_dir
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-job")
+
+    def submit(self, company_name: str, files: list[dict]) -> str:
+        job_id = uuid.uuid4().hex
+        job_path = os.path.join(self.job_dir, job_id)
+        os.makedirs(job_path, exist_ok=True)
+
+        stored = []
+        for index, file in enumerate(files):
+            path = os.path.join(job_path, f"{index}_{os.path.basename(file['filename'])}")
+            with open(path, "wb") as out:
+                shutil.copyfileobj(file["file"], out)
+            stored.append({"filename": file["filename"], "path": path})
+
+        with SessionLocal.begin() as db:
+            db.add(IngestJob(
+                id=job_id,
+                company_name=company_name,
+                status="queued",
+                files=stored,
+                created_at=datetime.utcnow(),
+            ))
+
+        self.pool.submit(self._run, job_id)
+        return job_id
+
+    def resume(self) -> None:
+        # Jobs interrupted by a restart start over; their uploads are still
+        # on disk until the job finishes.
+        with SessionLocal.begin() as db:
+            jobs = db.scalars(
+                select(IngestJob).where(IngestJob.status.in_(["queued", "running"]))
+            ).all()
+            job_ids = [job.id for job in jobs]
+
+        for job_id in job_ids:
+            self.pool.submit(self._run, job_id)
+
+    def _update(self, job_id: str, **fields) -> None:
+        with SessionLocal.begin() as db:
+            job = db.get(IngestJob, job_id)
+            for key, value in fields.items():
+                setattr(job, key, value)
+
+    def _run(self, job_id: str) -> None:
+        with SessionLocal() as db:
+            job = db.get(IngestJob, job_id)
+            company_name, stored = job.company_name, job.files
+
+        self._update(
+            job_id,
+            status="running",
+            started_at=datetime.utcnow(),
+            documents_loaded=0,
+            chunks_embedded=0,
+            chunks_skipped=0,
+            chunks_upserted=0,
+        )
+
+        handles = []
+        try:
+            files = []
+            for file in stored:
+                handle = open(file["path"], "rb")
+                handles.append(handle)
+                files.append({"filename": file["filename"], "file": handle})
+
+            self.ingest.ingest_company_data(
+                company_name,
+                files,
+                progress=lambda stats: self._update(job_id, **stats),
+            )
+            self._update(job_id, status="completed", finished_at=datetime.utcnow())
+
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+
+        finally:
+            for handle in handles:
+                handle.close()
+            shutil.rmtree(os.path.join(self.job_dir, job_id), ignore_errors=True)
+
+    def get(self, job_id: str) -> dict | None:
+        with SessionLocal() as db:
+            job = db.get(IngestJob, job_id)
+            if job is None:
+                return None
+
+            end = job.finished_at or datetime.utcnow()
+            elapsed = (end - job.started_at).total_seconds() if job.started_at else 0.0
+
+            return {
+                "job_id": job.id,
+                "company_name": job.company_name,
+                "status": job.status,
+                "documents_loaded": job.documents_loaded or 0,
+                "chunks_embedded": job.chunks_embedded or 0,
+                "chunks_skipped": job.chunks_skipped or 0,
+                "chunks_upserted": job.chunks_upserted or 0,
+                "throughput": round((job.chunks_upserted or 0) / elapsed, 2) if elapsed else 0.0,
+                "error": job.error,
+                "created_at": job.created_at,
+                "started_at": job.started_at,
+                "finished_at": job.finished_at,
+            }
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
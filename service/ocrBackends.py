@@ -0,0 +1,161 @@
+import queue
+import threading
+import time
+from typing import Iterable
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from config.OCR import OCR_BACKEND, OCR_LANG, TESSDATA_PATH
+
+try:
+    import tesserocr
+except ImportError:  # optional: needs libtesseract headers to build
+    tesserocr = None
+
+
+class OCRBackend:
+    name = "base"
+
+    def image_to_string(self, image: np.ndarray) -> str:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class PytesseractBackend(OCRBackend):
+    """Runs the tesseract binary once per image (temp file, fresh process)."""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = OCR_LANG):
+        self.lang = lang
+
+    def image_to_string(self, image: np.ndarray) -> str:
+        return pytesseract.image_to_string(
+            Image.fromarray(image),
+            lang=self.lang,
+            config="--psm 6",
+        )
+
+
+class TesserocrBackend(OCRBackend):
+    """Long-lived in-process Tesseract handles fed straight from numpy.
+
+    Language data is loaded once per handle. A handle serves one image at a
+    time, so there are up to as many as there are threads OCR'ing in this
+    process; the first is opened up front, the rest on demand.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, size: int = 1, lang: str = OCR_LANG, path: str | None = TESSDATA_PATH):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+
+        self.size = max(size, 1)
+        self.lang = lang
+        self.path = path
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._handles = []
+        self._lock = threading.Lock()
+
+        # Fail here, not on the first receipt, if tessdata is missing.
+        self._handles.append(self._new_handle())
+        self._idle.put(self._handles[0])
+
+    def _new_handle(self):
+        kwargs = {"lang": self.lang, "psm": tesserocr.PSM.SINGLE_BLOCK}
+        if self.path:
+            kwargs["path"] = self.path
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._handles) < self.size:
+                handle = self._new_handle()
+                self._handles.append(handle)
+                return handle
+
+        return self._idle.get()
+
+    def image_to_string(self, image: np.ndarray) -> str:
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+
+        handle = self._acquire()
+        try:
+            handle.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+            return handle.GetUTF8Text()
+        finally:
+            handle.Clear()
+            self._idle.put(handle)
+
+    def close(self) -> None:
+        with self._lock:
+            for handle in self._handles:
+                handle.End()
+            self._handles.clear()
+
+
+def get_ocr_backend(name: str = OCR_BACKEND, size: int = 1) -> OCRBackend:
+    if name == "tesserocr":
+        return TesserocrBackend(size=size)
+
+    if name == "auto" and tesserocr is not None:
+        try:
+            return TesserocrBackend(size=size)
+        except Exception:
+            pass
+
+    return PytesseractBackend()
+
+
+def benchmark(images: Iterable[np.ndarray], backend_names: Iterable[str], repeat: int = 3) -> dict[str, dict]:
+    """Time each backend over the same preprocessed pages.
+
+    The first pass is reported separately: it includes opening the backend
+    (loading language data into a tesserocr handle), which later passes reuse.
+    A backend that cannot be opened here (tesserocr not installed, no
+    tessdata) is reported as skipped and the others still run.
+    """
+    images = list(images)
+    results = {}
+
+    for name in backend_names:
+        started = time.perf_counter()
+        try:
+            backend = get_ocr_backend(name)
+        except Exception as error:
+            results[name] = {"skipped": str(error)}
+            continue
+
+        try:
+            for image in images:
+                backend.image_to_string(image)
+            first = time.perf_counter() - started
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for image in images:
+                    backend.image_to_string(image)
+                timings.append(time.perf_counter() - started)
+        finally:
+            backend.close()
+
+        results[backend.name] = {
+            "pages": len(images),
+            "first_pass_ms_per_page": round(first * 1000 / max(len(images), 1), 1),
+            "ms_per_page": round(min(timings, default=first) * 1000 / max(len(images), 1), 1),
+        }
+
+    return results
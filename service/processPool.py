@@ -0,0 +1,14 @@
+import multiprocessing
+from multiprocessing.context import BaseContext
+
+
+def worker_context() -> BaseContext:
+    """Start method for worker pools of a process that already runs threads.
+
+    Forking such a process copies locks other threads may hold. A forkserver
+    starts workers from a clean process instead; where it does not exist
+    (Windows), the platform default is spawn, which is clean already.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
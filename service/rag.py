@@ -1,34 +1,61 @@
-from typing import Dict, List
+import asyncio
+import re
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List
 import numpy as np
-from config.rag import get_rag_client
+from langchain_core.documents import Document
+from config.rag import (
+    RagClient,
+    get_rag_client,
+    forget_rag_client,
+    get_llm,
+    RAG_PROMPT,
+    NO_ANSWER,
+    RAG_FETCH_K,
+    RAG_TOP_K,
+    RAG_SCORE_CUTOFF,
+    RAG_DEDUP_SIMILARITY,
+    RAG_CONTEXT_TOKENS,
+    RAG_HYBRID_RRF_K,
+)
+from qdrant_client.models import QueryRequest, ScoredPoint
+from config.qdrant import (
+    get_embeddings,
+    has_sparse_vectors,
+    forget_collection,
+    is_missing_collection,
+    QDRANT_HYBRID,
+    QDRANT_SPARSE_VECTOR_NAME,
+)
+from service.answerCache import get_answer_cache
+from service.sparseEncoder import get_sparse_encoder
 
 
 class RagEngine:
     def __init__(self):
-        pass
+        self.answer_cache = get_answer_cache()
 
     async def get_answer(self, company_name: str, question: str) -> Dict:
-        rag_client = get_rag_client(company_name)
+        generation = self.answer_cache.generation(company_name)
+        embedding = await get_embeddings().aembed_query(question)
 
-        response = await rag_client.ainvoke({
-            "query": question
-        })
+        cached = self.answer_cache.get(company_name, question, embedding)
+        if cached is not None:
+            return cached
 
-        answer = response.get("result", "")
-        source_docs = response.get("source_documents", [])
+        result = await self._answer(company_name, question, embedding)
+        self.answer_cache.put(company_name, question, embedding, result, generation)
+        return result
 
+    def _citations(self, source_docs: List) -> tuple[List[Dict], float]:
         if not source_docs:
-            return {
-                "answer": answer,
-                "confidence": 0.0,
-                "citations": []
-            }
+            return [], 0.0
 
         citations = []
         relevance_scores = []
 
         for doc in source_docs:
-            score = doc.metadata.get("score", 0.75)  
+            score = doc.metadata.get("score", 0.0)
 
             citations.append({
                 "source": doc.metadata.get("source", "unknown"),
@@ -40,15 +67,225 @@ class RagEngine:
             relevance_scores.append(score)
 
         avg_retrieval_score = float(np.mean(relevance_scores))
-        support_ratio = min(len(source_docs) / 3, 1.0)
+        support_ratio = min(len(source_docs) / RAG_TOP_K, 1.0)
 
         confidence = round(
             0.6 * avg_retrieval_score + 0.4 * support_ratio,
             2
         )
 
+        return citations, confidence
+
+    async def _retrieve(self, company_name: str, question: str, embedding: List[float]) -> List[Document]:
+        rag_client = get_rag_client(company_name)
+
+        try:
+            points = await self._search(rag_client, question, embedding)
+        except Exception as error:
+            if not is_missing_collection(error):
+                raise
+            # The collection was dropped behind the registry's back; forget
+            # it and the cached client, and search once more with fresh ones.
+            forget_collection(rag_client.vectorstore.collection_name)
+            forget_rag_client(company_name)
+            rag_client = get_rag_client(company_name)
+            points = await self._search(rag_client, question, embedding)
+
+        vectorstore = rag_client.vectorstore
+        return self._select([
+            Document(
+                page_content=(point.payload or {}).get(vectorstore.content_payload_key, ""),
+                metadata={
+                    **((point.payload or {}).get(vectorstore.metadata_payload_key) or {}),
+                    "score": point.score,
+                },
+            )
+            for point in points
+        ])
+
+    async def _search(self, rag_client: RagClient, question: str, embedding: List[float]) -> List[ScoredPoint]:
+        vectorstore = rag_client.vectorstore
+
+        if QDRANT_HYBRID and has_sparse_vectors(vectorstore.collection_name):
+            return await asyncio.to_thread(
+                self._hybrid_search, rag_client, question, embedding
+            )
+
+        # Query Qdrant directly: the vector store wrapper re-reads the
+        # collection config on every search and drops the scores.
+        response = await asyncio.to_thread(
+            vectorstore.client.query_points,
+            collection_name=vectorstore.collection_name,
+            query=embedding,
+            using=vectorstore.vector_name,
+            query_filter=rag_client.filter,
+            search_params=rag_client.search_params,
+            limit=RAG_FETCH_K,
+            with_payload=True,
+            score_threshold=RAG_SCORE_CUTOFF,
+        )
+        return response.points
+
+    def _hybrid_search(
+        self,
+        rag_client: RagClient,
+        question: str,
+        embedding: List[float],
+    ) -> List[ScoredPoint]:
+        vectorstore = rag_client.vectorstore
+        encoder = get_sparse_encoder()
+        requests = [
+            QueryRequest(
+                query=embedding,
+                using=vectorstore.vector_name,
+                filter=rag_client.filter,
+                params=rag_client.search_params,
+                limit=RAG_FETCH_K,
+                with_payload=True,
+            )
+        ]
+        sparse_query = encoder.encode_query(question)
+        if sparse_query.indices:
+            # Sparse lookups only touch the posting lists of the query terms,
+            # so this stage is cheap next to the dense search.
+            requests.append(QueryRequest(
+                query=sparse_query,
+                using=QDRANT_SPARSE_VECTOR_NAME,
+                filter=rag_client.filter,
+                limit=RAG_FETCH_K,
+                with_payload=True,
+                with_vector=True,
+            ))
+
+        # Both searches go out in one round trip.
+        responses = vectorstore.client.query_batch_points(
+            collection_name=vectorstore.collection_name,
+            requests=requests,
+        )
+
+        # Reciprocal rank fusion; each point keeps its dense cosine score so
+        # the cutoff and the reported confidence mean the same as before.
+        fused: Dict = {}
+        for rank, point in enumerate(responses[0].points):
+            fused[point.id] = [1 / (RAG_HYBRID_RRF_K + rank + 1), point]
+
+        codes = encoder.code_tokens(question)
+        exact = set()
+        for rank, point in enumerate(responses[1].points if len(responses) > 1 else []):
+            if point.id not in fused:
+                point.score = self._cosine(embedding, point.vector, vectorstore.vector_name)
+                fused[point.id] = [0.0, point]
+            fused[point.id][0] += 1 / (RAG_HYBRID_RRF_K + rank + 1)
+
+            content = (point.payload or {}).get(vectorstore.content_payload_key, "")
+            if codes & encoder.code_tokens(content):
+                exact.add(point.id)
+
+        # Chunks that contain an identifier from the question (an SKU, an
+        # invoice number) are kept even if their embedding is far off.
+        return [
+            point
+            for _, point in sorted(fused.values(), key=lambda entry: entry[0], reverse=True)
+            if point.score >= RAG_SCORE_CUTOFF or point.id in exact
+        ]
+
+    def _cosine(self, embedding: List[float], vector, vector_name: str) -> float:
+        if isinstance(vector, dict):
+            vector = vector.get(vector_name)
+        if not vector:
+            return 0.0
+
+        a = np.asarray(embedding, dtype=np.float32)
+        b = np.asarray(vector, dtype=np.float32)
+        return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) or 1.0))
+
+    def _select(self, docs: List[Document]) -> List[Document]:
+        selected = []
+        seen_words = []
+        # ~4 characters per token.
+        budget = RAG_CONTEXT_TOKENS * 4
+
+        for doc in docs:
+            if len(selected) >= RAG_TOP_K or budget <= 0:
+                break
+
+            words = set(re.findall(r"\w+", doc.page_content.lower()))
+            if any(
+                len(words & other) / max(len(words | other), 1) >= RAG_DEDUP_SIMILARITY
+                for other in seen_words
+            ):
+                continue
+
+            doc.page_content = doc.page_content[:budget]
+            budget -= len(doc.page_content)
+            seen_words.append(words)
+            selected.append(doc)
+
+        return selected
+
+    def _prompt(self, question: str, source_docs: List[Document]) -> str:
+        return RAG_PROMPT.format(
+            context="\n\n".join(doc.page_content for doc in source_docs),
+            question=question,
+        )
+
+    async def _answer(self, company_name: str, question: str, embedding: List[float]) -> Dict:
+        source_docs = await self._retrieve(company_name, question, embedding)
+
+        if not source_docs:
+            return {
+                "answer": NO_ANSWER,
+                "confidence": 0.0,
+                "citations": []
+            }
+
+        response = await get_llm().ainvoke(self._prompt(question, source_docs))
+        citations, confidence = self._citations(source_docs)
+
         return {
-            "answer": answer,
+            "answer": response.text,
             "confidence": confidence,
             "citations": citations
         }
+
+    async def stream_answer(self, company_name: str, question: str) -> AsyncIterator[Dict]:
+        generation = self.answer_cache.generation(company_name)
+        embedding = await get_embeddings().aembed_query(question)
+
+        cached = self.answer_cache.get(company_name, question, embedding)
+        if cached is not None:
+            yield {"event": "citations", "data": cached["citations"]}
+            yield {"event": "token", "data": cached["answer"]}
+            yield {"event": "done", "data": {"confidence": cached["confidence"]}}
+            return
+
+        source_docs = await self._retrieve(company_name, question, embedding)
+        citations, confidence = self._citations(source_docs)
+
+        yield {"event": "citations", "data": citations}
+
+        if not source_docs:
+            yield {"event": "token", "data": NO_ANSWER}
+            yield {"event": "done", "data": {"confidence": 0.0}}
+            self.answer_cache.put(company_name, question, embedding, {
+                "answer": NO_ANSWER,
+                "confidence": 0.0,
+                "citations": []
+            }, generation)
+            return
+
+        # Closing this generator (client gone) closes the upstream stream too.
+        tokens = []
+        async with aclosing(get_llm().astream(self._prompt(question, source_docs))) as chunks:
+            async for chunk in chunks:
+                if chunk.text:
+                    tokens.append(chunk.text)
+                    yield {"event": "token", "data": chunk.text}
+
+        yield {"event": "done", "data": {"confidence": confidence}}
+
+        self.answer_cache.put(company_name, question, embedding, {
+            "answer": "".join(tokens),
+            "confidence": confidence,
+            "citations": citations
+        }, generation)
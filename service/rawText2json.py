@@ -1,22 +1,81 @@
+import asyncio
+import random
+from collections import Counter
 from google.genai import types
-from config.genai import GENAI_PROMPT,GENAI_CLIENT,GENAI_MODEL,GENAI_RESPONSE_SCHEMA
+from google.genai import errors
+from config.genai import (
+    GENAI_PROMPT,
+    GENAI_CLIENT,
+    GENAI_MODEL,
+    GENAI_RESPONSE_SCHEMA,
+    GENAI_MAX_CONCURRENCY,
+    GENAI_MAX_RETRIES,
+    GENAI_BACKOFF_BASE,
+    GENAI_BACKOFF_MAX,
+    GENAI_TIMEOUT,
+    GENAI_BATCH_MODE,
+    GENAI_BATCH_TOKEN_BUDGET,
+    GENAI_BATCH_MAX_RECEIPTS,
+    GENAI_BATCH_PROMPT,
+    GENAI_BATCH_MARKER,
+    GENAI_BATCH_RESPONSE_SCHEMA,
+    RECEIPT_HEURISTICS,
+    RECEIPT_HEURISTIC_MIN_CONFIDENCE,
+)
+from service.receiptHeuristics import HeuristicReceiptParser
+
+_RETRYABLE_CODES = {429, 503}
+
+_GENAI_SLOTS = asyncio.Semaphore(GENAI_MAX_CONCURRENCY)
 
 
 class RawText2JsonService:
-    def __init__(self):
-        self.client = GENAI_CLIENT
+    def __init__(
+        self,
+        client=None,
+        batch_mode: bool = GENAI_BATCH_MODE,
+        heuristics: bool = RECEIPT_HEURISTICS,
+        min_confidence: float = RECEIPT_HEURISTIC_MIN_CONFIDENCE,
+    ):
+        self.client = client or GENAI_CLIENT
         self.model = GENAI_MODEL
         self.prompt = GENAI_PROMPT
+        self.batch_mode = batch_mode
+        self.heuristics = HeuristicReceiptParser() if heuristics else None
+        self.min_confidence = min_confidence
+        # Receipts parsed locally vs. sent to Gemini.
+        self.stats = Counter()
+        self.config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=GENAI_RESPONSE_SCHEMA
+        )
+        self.batch_config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=GENAI_BATCH_RESPONSE_SCHEMA
+        )
+
+    def _parse_locally(self, ocr_text: str) -> dict | None:
+        if self.heuristics is None:
+            return None
+
+        receipt, confidence = self.heuristics.parse(ocr_text)
+        if confidence < self.min_confidence:
+            return None
+
+        self.stats["heuristic"] += 1
+        return receipt
 
     def parse_receipt(self, ocr_text: str) -> dict:
+        receipt = self._parse_locally(ocr_text)
+        if receipt is not None:
+            return receipt
+
+        self.stats["llm"] += 1
         try:
             response = self.client.models.generate_content(
                 model=self.model,
                 contents=self.prompt + ocr_text,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    response_schema=GENAI_RESPONSE_SCHEMA
-                )
+                config=self.config
             )
 
             return response.parsed
@@ -24,3 +83,118 @@ class RawText2JsonService:
         except Exception as e:
             print(f"Error parsing receipt: {e}")
             return {}
+
+    async def _generate(self, contents: str, config: types.GenerateContentConfig):
+        for attempt in range(GENAI_MAX_RETRIES + 1):
+            async with _GENAI_SLOTS:
+                try:
+                    return await asyncio.wait_for(
+                        self.client.aio.models.generate_content(
+                            model=self.model,
+                            contents=contents,
+                            config=config
+                        ),
+                        timeout=GENAI_TIMEOUT
+                    )
+                except errors.APIError as e:
+                    if e.code not in _RETRYABLE_CODES or attempt == GENAI_MAX_RETRIES:
+                        raise
+
+            # Full jitter keeps a burst of rate-limited calls from retrying
+            # in lockstep; the slot is released while we wait.
+            delay = min(GENAI_BACKOFF_MAX, GENAI_BACKOFF_BASE * 2 ** attempt)
+            await asyncio.sleep(random.uniform(0, delay))
+
+    async def aparse_receipt(self, ocr_text: str) -> dict:
+        receipt = self._parse_locally(ocr_text)
+        if receipt is not None:
+            return receipt
+
+        self.stats["llm"] += 1
+        return await self._aparse_with_llm(ocr_text)
+
+    async def _aparse_with_llm(self, ocr_text: str) -> dict:
+        try:
+            response = await self._generate(self.prompt + ocr_text, self.config)
+            return response.parsed
+
+        except Exception as e:
+            print(f"Error parsing receipt: {e!r}")
+            return {}
+
+    def _pack_batches(self, ocr_texts: list[str]) -> list[list[int]]:
+        batches = []
+        batch, batch_tokens = [], 0
+
+        for index, ocr_text in enumerate(ocr_texts):
+            # ~4 characters per token is close enough to budget a request.
+            tokens = len(ocr_text) // 4 + 16
+
+            if batch and (
+                batch_tokens + tokens > GENAI_BATCH_TOKEN_BUDGET
+                or len(batch) >= GENAI_BATCH_MAX_RECEIPTS
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+
+            batch.append(index)
+            batch_tokens += tokens
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _aparse_batch(self, ocr_texts: list[str]) -> list[dict]:
+        if len(ocr_texts) == 1:
+            return [await self._aparse_with_llm(ocr_texts[0])]
+
+        contents = GENAI_BATCH_PROMPT + "\n".join(
+            GENAI_BATCH_MARKER.format(index=index) + "\n" + ocr_text.strip()
+            for index, ocr_text in enumerate(ocr_texts)
+        )
+
+        results: list[dict | None] = [None] * len(ocr_texts)
+
+        try:
+            response = await self._generate(contents, self.batch_config)
+
+            for receipt in response.parsed or []:
+                index = receipt.pop("receipt_index", None)
+                if isinstance(index, int) and 0 <= index < len(results) and results[index] is None:
+                    results[index] = receipt
+
+        except Exception as e:
+            print(f"Error parsing receipt batch: {e!r}")
+
+        # Anything the batch response dropped, duplicated or garbled is
+        # parsed again on its own.
+        missing = [index for index, receipt in enumerate(results) if not receipt]
+        retried = await asyncio.gather(
+            *(self._aparse_with_llm(ocr_texts[index]) for index in missing)
+        )
+        for index, receipt in zip(missing, retried):
+            results[index] = receipt
+
+        return results
+
+    async def aparse_receipts(self, ocr_texts: list[str]) -> list[dict]:
+        if not self.batch_mode:
+            return list(await asyncio.gather(
+                *(self.aparse_receipt(ocr_text) for ocr_text in ocr_texts)
+            ))
+
+        results: list[dict] = [self._parse_locally(ocr_text) for ocr_text in ocr_texts]
+
+        # Only receipts the local parser was not sure about go to Gemini.
+        escalated = [index for index, receipt in enumerate(results) if receipt is None]
+        self.stats["llm"] += len(escalated)
+
+        batches = self._pack_batches([ocr_texts[i] for i in escalated])
+        batch_results = await asyncio.gather(
+            *(self._aparse_batch([ocr_texts[escalated[i]] for i in batch]) for batch in batches)
+        )
+
+        for batch, receipts in zip(batches, batch_results):
+            for index, receipt in zip(batch, receipts):
+                results[escalated[index]] = receipt
+        return results
@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import select, delete, func
+
+from schemas.DataModels import ReceiptCacheEntry
+from config.database import SessionLocal, init_db
+from config.cache import RECEIPT_CACHE_MAX_ENTRIES, RECEIPT_CACHE_MEMORY_ENTRIES
+
+
+class ReceiptCache:
+    def __init__(
+        self,
+        max_entries: int = RECEIPT_CACHE_MAX_ENTRIES,
+        memory_entries: int = RECEIPT_CACHE_MEMORY_ENTRIES,
+    ):
+        init_db()
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Rows in the table, counted once and then tracked on put/evict so
+        # eviction does not have to count the whole table on every write.
+        with SessionLocal() as db:
+            self._count = db.scalar(select(func.count()).select_from(ReceiptCacheEntry)) or 0
+
+    @staticmethod
+    def file_key(file_bytes: bytes) -> str:
+        return "file:" + hashlib.sha256(file_bytes).hexdigest()
+
+    @staticmethod
+    def text_key(ocr_text: str) -> str:
+        normalized = re.sub(r"\s+", " ", ocr_text).strip().lower()
+        return "text:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _memory_get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def get(self, key: str) -> dict | None:
+        entry = self._memory_get(key)
+        if entry is not None:
+            return entry
+
+        with SessionLocal() as db:
+            row = db.get(ReceiptCacheEntry, key)
+            if row is None:
+                return None
+
+            row.last_used_at = datetime.utcnow()
+            entry = {
+                "receipt_id": row.receipt_id,
+                "ocr_text": row.ocr_text,
+                "data": row.data,
+            }
+            db.commit()
+
+        self._remember(key, entry)
+        return entry
+
+    def put(self, keys: list[str], ocr_text: str, data: dict, receipt_id: int) -> dict:
+        entry = {
+            "receipt_id": receipt_id,
+            "ocr_text": ocr_text,
+            "data": data,
+        }
+        now = datetime.utcnow()
+
+        with SessionLocal() as db:
+            added = 0
+            for key in keys:
+                added += db.get(ReceiptCacheEntry, key) is None
+                db.merge(ReceiptCacheEntry(
+                    key=key,
+                    receipt_id=receipt_id,
+                    ocr_text=ocr_text,
+                    data=data,
+                    last_used_at=now,
+                ))
+            db.flush()
+            with self._lock:
+                self._count += added
+            self._evict(db)
+            db.commit()
+
+        for key in keys:
+            self._remember(key, entry)
+        return entry
+
+    # The route is async; database work runs on a worker thread so it does
+    # not stall the event loop. Memory hits are answered in place.
+    async def aget(self, key: str) -> dict | None:
+        entry = self._memory_get(key)
+        if entry is not None:
+            return entry
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, keys: list[str], ocr_text: str, data: dict, receipt_id: int) -> dict:
+        return await asyncio.to_thread(self.put, keys, ocr_text, data, receipt_id)
+
+    def _evict(self, db) -> None:
+        overflow = self._count - self.max_entries
+        if overflow <= 0:
+            return
+
+        stale = select(ReceiptCacheEntry.key).order_by(ReceiptCacheEntry.last_used_at).limit(overflow)
+        stale_keys = list(db.scalars(stale))
+        db.execute(delete(ReceiptCacheEntry).where(ReceiptCacheEntry.key.in_(stale_keys)))
+
+        with self._lock:
+            self._count -= len(stale_keys)
+            for key in stale_keys:
+                self._memory.pop(key, None)
@@ -0,0 +1,256 @@
+import re
+from datetime import date
+
+from config.genai import (
+    RECEIPT_DATE_ORDER,
+    RECEIPT_DOLLAR_CURRENCY,
+)
+
+# Amounts with exactly two decimals ("1,234.56", "1.234,56", "-3.00");
+# percentages such as "15.00%" and dotted dates such as "05.06.2024" are
+# not amounts.
+_AMOUNT = r"-?\d{1,3}(?:[,.\s]\d{3})*[.,]\d{2}|-?\d+[.,]\d{2}"
+_AMOUNT_RE = re.compile(rf"(?<![\d.,])({_AMOUNT})(?![\d%]|\s*%|[.,]\d)")
+
+_CURRENCY_CODES = ("USD", "NZD", "AUD", "CAD", "EUR", "GBP", "INR", "JPY", "CHF", "SGD", "HKD", "CNY")
+_CURRENCY_CODE_RE = re.compile(rf"\b({'|'.join(_CURRENCY_CODES)})\b")
+_CURRENCY_SYMBOLS = [
+    ("NZ$", "NZD"), ("A$", "AUD"), ("AU$", "AUD"), ("C$", "CAD"), ("CA$", "CAD"),
+    ("US$", "USD"), ("S$", "SGD"), ("HK$", "HKD"),
+    ("€", "EUR"), ("£", "GBP"), ("₹", "INR"), ("Rs.", "INR"), ("¥", "JPY"),
+]
+
+_MONTHS = {
+    month: number for number, month in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"],
+        start=1,
+    )
+}
+_ISO_DATE_RE = re.compile(r"\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b")
+_NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})\b")
+_DAY_MONTH_RE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?[\s-]+([a-z]{3})[a-z]*\.?,?[\s-]+(\d{4}|\d{2})\b", re.I)
+_MONTH_DAY_RE = re.compile(r"\b([a-z]{3})[a-z]*\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4}|\d{2})\b", re.I)
+
+_TOTAL_RE = re.compile(r"\b(grand\s*total|total\s*(?:due|amount|payable)?|amount\s*(?:due|payable)|balance\s*due)\b", re.I)
+_NOT_TOTAL_RE = re.compile(r"\b(sub\s*-?\s*total|total\s*(?:tax|gst|vat|items?|qty|quantity|savings?|discount))\b", re.I)
+_SUBTOTAL_RE = re.compile(r"\bsub\s*-?\s*total\b", re.I)
+_TAX_RE = re.compile(r"\b(tax|gst|vat|hst|pst)\b", re.I)
+_NOT_TAX_RE = re.compile(r"\b(tax\s*invoice|gst\s*(?:no|reg|number|#)|vat\s*(?:no|reg|number|#)|abn|excl)", re.I)
+_PAYMENT_RE = re.compile(
+    r"\b(cash|change|card|visa|master\s*card|amex|eftpos|debit|credit|tender(?:ed)?|paid|payment|"
+    r"rounding|balance|auth|approved|tip|points?|savings?)\b",
+    re.I,
+)
+_DISCOUNT_RE = re.compile(r"\b(discount|promo|coupon|voucher)\b", re.I)
+_HEADER_SKIP_RE = re.compile(
+    r"\b(tel|phone|ph|fax|www|http|email|@|abn|gst|vat|tax\s*invoice|receipt|invoice|order|"
+    r"table|server|cashier|welcome|date|time|street|st\.|road|rd\.|ave)\b",
+    re.I,
+)
+_QTY_PRICE_RE = re.compile(
+    rf"(\d+(?:\.\d+)?)\s*(?:kg|g|lb|ea|pcs?)?\s*[x@*]\s*(?:[^\d\s-]{{0,3}})?({_AMOUNT})(?:\s*/\s*\w+)?",
+    re.I,
+)
+_LEADING_QTY_RE = re.compile(r"^(\d{1,3})\s*[x*]?\s+(?=[^\W\d])", re.I)
+
+
+def _amount(text: str) -> float:
+    text = text.replace(" ", "")
+    # The last separator is the decimal point; the others group thousands.
+    head, decimals = text[:-3], text[-2:]
+    return float(re.sub(r"[.,]", "", head) + "." + decimals)
+
+
+def _amounts(line: str) -> list[float]:
+    return [_amount(match) for match in _AMOUNT_RE.findall(line)]
+
+
+def _close(a: float, b: float, tolerance: float = 0.02) -> bool:
+    return abs(a - b) <= tolerance
+
+
+class HeuristicReceiptParser:
+    """Rule-based receipt parser for the common point-of-sale layout.
+
+    Produces the same structure as the Gemini parser (GENAI_RESPONSE_SCHEMA)
+    plus a confidence in [0, 1] built from what was found and whether the
+    numbers agree with each other: line totals with quantity x unit price,
+    the items with the subtotal or total, subtotal plus tax with the total.
+    """
+
+    def __init__(self, date_order: str = RECEIPT_DATE_ORDER, dollar_currency: str = RECEIPT_DOLLAR_CURRENCY):
+        self.date_order = date_order.upper()
+        self.dollar_currency = dollar_currency
+
+    def _merchant(self, lines: list[str]) -> str | None:
+        for line in lines[:6]:
+            letters = sum(char.isalpha() for char in line)
+            if letters < 3 or letters < len(line.replace(" ", "")) / 2:
+                continue
+            if _HEADER_SKIP_RE.search(line) or _AMOUNT_RE.search(line):
+                continue
+            return re.sub(r"\s{2,}", " ", line).strip(" *-=#")
+        return None
+
+    def _date(self, text: str) -> str | None:
+        candidates = []
+
+        for year, month, day in _ISO_DATE_RE.findall(text):
+            candidates.append((int(year), int(month), int(day)))
+
+        for first, second, year in _NUMERIC_DATE_RE.findall(text):
+            first, second = int(first), int(second)
+            if first > 12 or (second <= 12 and self.date_order == "DMY"):
+                day, month = first, second
+            else:
+                month, day = first, second
+            candidates.append((int(year), month, day))
+
+        for day, month, year in _DAY_MONTH_RE.findall(text):
+            if month.lower() in _MONTHS:
+                candidates.append((int(year), _MONTHS[month.lower()], int(day)))
+
+        for month, day, year in _MONTH_DAY_RE.findall(text):
+            if month.lower() in _MONTHS:
+                candidates.append((int(year), _MONTHS[month.lower()], int(day)))
+
+        for year, month, day in candidates:
+            if year < 100:
+                year += 2000
+            try:
+                return date(year, month, day).isoformat()
+            except ValueError:
+                continue
+        return None
+
+    def _currency(self, text: str) -> str | None:
+        match = _CURRENCY_CODE_RE.search(text.upper())
+        if match:
+            return match.group(1)
+
+        for symbol, code in _CURRENCY_SYMBOLS:
+            if symbol in text:
+                return code
+
+        if "$" in text:
+            return self.dollar_currency
+        return None
+
+    def _item(self, line: str, amounts: list[float]) -> dict | None:
+        total_price = amounts[-1]
+        name = _AMOUNT_RE.sub("", line)
+        quantity, unit_price = 1.0, total_price
+
+        match = _QTY_PRICE_RE.search(line)
+        if match:
+            quantity, unit_price = float(match.group(1)), _amount(match.group(2))
+            name = _AMOUNT_RE.sub("", line[:match.start()] + line[match.end():])
+        else:
+            leading = _LEADING_QTY_RE.match(line)
+            if leading:
+                quantity = float(leading.group(1))
+                name = _AMOUNT_RE.sub("", line[leading.end():])
+                unit_price = round(total_price / quantity, 2) if quantity else total_price
+
+        # Quantity markers ("x", "@") left over once the numbers are gone.
+        name = re.sub(r"[$€£¥₹]|(?<!\S)[x@*](?!\S)|\s{2,}", " ", name, flags=re.I)
+        name = re.sub(r"\s{2,}", " ", name).strip(" .:*-=#@")
+        if sum(char.isalpha() for char in name) < 2:
+            return None
+
+        return {
+            "item_name": name,
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "total_price": total_price,
+        }
+
+    def parse(self, ocr_text: str) -> tuple[dict, float]:
+        lines = [line.strip() for line in ocr_text.splitlines() if line.strip()]
+
+        items, adjustments = [], 0.0
+        totals, subtotals, taxes = [], [], []
+        orphan_name = None
+        in_footer = False
+
+        for line in lines:
+            amounts = _amounts(line)
+
+            if _SUBTOTAL_RE.search(line):
+                subtotals.extend(amounts[-1:])
+                in_footer = True
+                continue
+            if _TOTAL_RE.search(line) and not _NOT_TOTAL_RE.search(line):
+                totals.extend(amounts[-1:])
+                in_footer = True
+                continue
+            if _TAX_RE.search(line) and not _NOT_TAX_RE.search(line):
+                taxes.extend(amounts[-1:])
+                in_footer = in_footer or bool(amounts)
+                continue
+
+            if in_footer or _PAYMENT_RE.search(line):
+                orphan_name = None
+                continue
+
+            if not amounts:
+                # Possibly an item name whose quantity and price follow on
+                # the next line.
+                orphan_name = line
+                continue
+
+            if _DISCOUNT_RE.search(line):
+                adjustments -= abs(amounts[-1])
+                continue
+
+            # "2 @ 4.50   9.00" under a line holding only the item name.
+            if orphan_name and not any(char.isalpha() for char in _QTY_PRICE_RE.sub("", line)):
+                line = f"{orphan_name} {line}"
+            item = self._item(line, amounts)
+            orphan_name = None
+            if item:
+                items.append(item)
+
+        total = max(totals) if totals else None
+        subtotal = subtotals[-1] if subtotals else None
+        tax = round(sum(taxes), 2) if taxes else None
+
+        receipt = {
+            "merchant_name": self._merchant(lines),
+            "receipt_date": self._date(ocr_text),
+            "currency": self._currency(ocr_text),
+            "tax_amount": tax,
+            "total_amount": total,
+            "items": items,
+        }
+        return receipt, self._confidence(receipt, subtotal, adjustments)
+
+    def _confidence(self, receipt: dict, subtotal: float | None, adjustments: float) -> float:
+        total = receipt["total_amount"]
+        if total is None or not receipt["items"]:
+            return 0.0
+
+        items = receipt["items"]
+        tax = receipt["tax_amount"] or 0.0
+        items_sum = round(sum(item["total_price"] for item in items) + adjustments, 2)
+        tolerance = 0.01 * len(items) + 0.01
+
+        # Items add up to the subtotal, the total, or the total before tax.
+        targets = [total, total - tax] + ([subtotal] if subtotal is not None else [])
+        items_agree = any(_close(items_sum, target, tolerance) for target in targets)
+
+        lines_agree = all(
+            _close(item["quantity"] * item["unit_price"], item["total_price"], 0.01 + 0.005 * item["quantity"])
+            for item in items
+        )
+        footer_agrees = subtotal is None or _close(subtotal + tax, total) or _close(subtotal, total)
+
+        confidence = 0.2
+        confidence += 0.35 if items_agree else 0.0
+        confidence += 0.1 if lines_agree else 0.0
+        confidence += 0.05 if footer_agrees else 0.0
+        confidence += 0.1 if receipt["merchant_name"] else 0.0
+        confidence += 0.1 if receipt["receipt_date"] else 0.0
+        confidence += 0.05 if receipt["currency"] else 0.0
+        confidence += 0.05 if receipt["tax_amount"] is not None else 0.0
+        return round(confidence, 2)
@@ -0,0 +1,74 @@
+import re
+import zlib
+from collections import Counter
+
+from qdrant_client.models import SparseVector
+
+# Keeps codes such as "INV-2024-0113" or "v2.1" together as one token; their
+# parts are emitted as well so partial codes still match.
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+
+class SparseEncoder:
+    """BM25-style sparse vectors for Qdrant.
+
+    Documents carry the saturated term frequency of each token; queries carry
+    a weight of one per token. The IDF half of BM25 is left to Qdrant
+    (``Modifier.IDF`` on the sparse vector), which knows the corpus.
+    Tokens are hashed to indices so no vocabulary has to be kept anywhere.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 100.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    def tokens(self, text: str) -> list[str]:
+        tokens = []
+        for token in _TOKEN_RE.findall(text.lower()):
+            tokens.append(token)
+            parts = re.split(r"[-_./]", token)
+            if len(parts) > 1:
+                tokens.extend(part for part in parts if part)
+        return tokens
+
+    def code_tokens(self, text: str) -> set[str]:
+        """Tokens that look like identifiers (SKUs, invoice or part numbers)."""
+        return {
+            token for token in _TOKEN_RE.findall(text.lower())
+            if any(char.isdigit() for char in token) and any(char.isalpha() for char in token)
+        }
+
+    def _index(self, token: str) -> int:
+        # crc32 rather than hash(): it must be stable across processes.
+        return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+    def _vector(self, weights: dict[int, float]) -> SparseVector:
+        indices = sorted(weights)
+        return SparseVector(indices=indices, values=[weights[index] for index in indices])
+
+    def encode_document(self, text: str) -> SparseVector:
+        tokens = self.tokens(text)
+        norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_doc_length)
+
+        weights: dict[int, float] = {}
+        for token, tf in Counter(tokens).items():
+            index = self._index(token)
+            weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (tf + norm)
+        return self._vector(weights)
+
+    def encode_documents(self, texts: list[str]) -> list[SparseVector]:
+        return [self.encode_document(text) for text in texts]
+
+    def encode_query(self, text: str) -> SparseVector:
+        return self._vector({self._index(token): 1.0 for token in set(self.tokens(text))})
+
+
+_ENCODER = None
+
+
+def get_sparse_encoder() -> SparseEncoder:
+    global _ENCODER
+    if _ENCODER is None:
+        _ENCODER = SparseEncoder()
+    return _ENCODER
@@ -0,0 +1,94 @@
+from qdrant_client.models import PointStruct, VectorParams
+
+from config.qdrant import (
+    get_qdrant_client,
+    ensure_collection,
+    forget_collection,
+    tenant_id_for,
+    QDRANT_SHARED_COLLECTION,
+)
+
+
+def _vector_shape(client, collection_name: str) -> tuple | None:
+    # Points are copied as-is, so the dense vector (a single unnamed one)
+    # and the sparse vector names must be the same on both sides.
+    params = client.get_collection(collection_name).config.params
+    if not isinstance(params.vectors, VectorParams):
+        return None
+    return params.vectors.size, params.vectors.distance, sorted(params.sparse_vectors or {})
+
+
+def migrate_to_shared_collection(
+    companies: list[str] | None = None,
+    all_collections: bool = False,
+    batch_size: int = 256,
+    drop_source: bool = False,
+) -> tuple[dict[str, int], dict[str, str]]:
+    """Copy per-company collections into the shared collection.
+
+    Either the companies to move are named, or ``all_collections`` is set to
+    take every other collection in Qdrant. Collections whose vectors do not
+    match the shared collection are skipped and returned with the reason,
+    next to the point counts of the ones copied.
+    """
+    if not companies and not all_collections:
+        raise ValueError("Name the companies to migrate, or pass all_collections=True")
+
+    client = get_qdrant_client()
+    ensure_collection(QDRANT_SHARED_COLLECTION)
+    shared_shape = _vector_shape(client, QDRANT_SHARED_COLLECTION)
+
+    if companies:
+        # Per-company collections are named after the tenant id.
+        names = [tenant_id_for(company) for company in companies]
+    else:
+        names = [collection.name for collection in client.get_collections().collections]
+
+    migrated, skipped = {}, {}
+
+    for tenant_id in dict.fromkeys(names):
+        if tenant_id == QDRANT_SHARED_COLLECTION:
+            continue
+
+        if not client.collection_exists(tenant_id):
+            skipped[tenant_id] = "no such collection"
+            continue
+
+        shape = _vector_shape(client, tenant_id)
+        if shape is None or shape != shared_shape:
+            skipped[tenant_id] = "vector params differ from the shared collection"
+            continue
+
+        offset = None
+        count = 0
+
+        while True:
+            records, offset = client.scroll(
+                collection_name=tenant_id,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if not records:
+                break
+
+            points = []
+            for record in records:
+                payload = dict(record.payload or {})
+                payload["metadata"] = {**(payload.get("metadata") or {}), "company": tenant_id}
+                points.append(PointStruct(id=record.id, vector=record.vector, payload=payload))
+
+            client.upsert(collection_name=QDRANT_SHARED_COLLECTION, points=points)
+            count += len(points)
+
+            if offset is None:
+                break
+
+        migrated[tenant_id] = count
+
+        if drop_source:
+            client.delete_collection(tenant_id)
+            forget_collection(tenant_id)
+
+    return migrated, skipped
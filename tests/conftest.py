@@ -0,0 +1,4 @@
+import os
+
+# Parsing modules build a Gemini client at import time; use the offline one.
+os.environ.setdefault("GENAI_FAKE_LATENCY", "0")
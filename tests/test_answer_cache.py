@@ -0,0 +1,16 @@
+from service.answerCache import AnswerCache
+
+
+def test_answer_from_before_an_ingest_is_not_stored():
+    cache = AnswerCache(max_entries=8, ttl=60, similarity=0.95)
+    embedding = [1.0, 0.0]
+
+    generation = cache.generation("Acme Co")
+    cache.invalidate("acme_co")
+    cache.put("Acme Co", "What are your hours?", embedding, {"answer": "stale"}, generation)
+
+    assert cache.get("Acme Co", "What are your hours?", embedding) is None
+
+    cache.put("Acme Co", "What are your hours?", embedding, {"answer": "fresh"}, cache.generation("Acme Co"))
+
+    assert cache.get("Acme Co", "what are your hours", embedding) == {"answer": "fresh"}
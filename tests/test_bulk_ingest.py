@@ -0,0 +1,40 @@
+from langchain_core.embeddings import Embeddings
+
+import config.qdrant
+from service.bulkIngest import BulkIngest, IngestManifest
+
+
+class ConstantEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [[1.0, 0.0, 0.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0, 0.0]
+
+
+def test_corrupt_file_is_reported_and_the_rest_still_loads(tmp_path, monkeypatch):
+    company = tmp_path / "data" / "acme"
+    company.mkdir(parents=True)
+    (company / "a.txt").write_text("Opening hours are nine to five.")
+    (company / "b.pdf").write_bytes(b"%PDF-1.4\nnot really a pdf")
+    (company / "c.txt").write_text("Refunds take five business days.")
+
+    monkeypatch.setattr(config.qdrant, "_QDRANT_CLIENT", config.qdrant._LockedQdrantClient(location=":memory:"))
+    monkeypatch.setattr(config.qdrant, "_EMBEDDINGS", ConstantEmbeddings())
+    config.qdrant.forget_collection("acme")
+
+    manifest_path = str(tmp_path / "manifest.jsonl")
+    results = BulkIngest(
+        data_path=str(tmp_path / "data"),
+        parse_workers=1,
+        manifest_path=manifest_path,
+    ).run()
+
+    stats = results["acme"]
+    assert stats["files_loaded"] == 2
+    assert stats["files_failed"] == 1
+    assert list(stats["errors"]) == ["b.pdf"]
+
+    manifest = IngestManifest(manifest_path)
+    manifest.close()
+    assert sorted(manifest.done) == ["acme/a.txt", "acme/c.txt"]
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+from langchain_core.embeddings import Embeddings
+
+from service.embeddingBatcher import QueryBatcher
+
+
+class SlowEmbeddings(Embeddings):
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def embed_documents(self, texts):
+        self.started.set()
+        self.release.wait(timeout=5)
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_cancelled_caller_does_not_stop_the_batcher():
+    embeddings = SlowEmbeddings()
+    batcher = QueryBatcher(embeddings, max_wait_ms=1, max_batch_size=8)
+
+    async def scenario():
+        first = asyncio.create_task(batcher.aembed("q1"))
+        await asyncio.to_thread(embeddings.started.wait, 5)
+
+        # Cancel while its batch is being embedded.
+        first.cancel()
+        embeddings.release.set()
+        try:
+            await first
+        except asyncio.CancelledError:
+            pass
+
+        return await asyncio.wait_for(batcher.aembed("q22"), timeout=5)
+
+    assert asyncio.run(scenario()) == [3.0]
+    assert batcher._thread.is_alive()
+
+
+def test_caller_cancelled_while_queued_is_skipped():
+    embeddings = SlowEmbeddings()
+    embeddings.release.set()
+    batcher = QueryBatcher(embeddings, max_wait_ms=1, max_batch_size=8)
+
+    future = batcher.submit("never")
+    future.cancel()
+
+    assert batcher.embed("q1") == [2.0]
+    assert batcher._thread.is_alive()
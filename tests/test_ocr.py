@@ -0,0 +1,24 @@
+import io
+
+from PIL import Image
+
+import service.OCR
+from service.OCR import OCRService, _extract_text
+from service.ocrBackends import OCRBackend
+
+
+class EchoBackend(OCRBackend):
+    def image_to_string(self, image):
+        return f"{image.shape[1]}x{image.shape[0]}"
+
+
+def test_worker_returns_the_preprocessing_path_with_the_text(monkeypatch):
+    monkeypatch.setattr(service.OCR, "_WORKER_OCR", OCRService(backend=EchoBackend()))
+    image = io.BytesIO()
+    Image.new("L", (200, 80), 255).save(image, "PNG")
+
+    text, paths = _extract_text(image.getvalue(), "image/png")
+
+    assert text == "200x80"
+    assert sum(paths.values()) == 1
+    assert not service.OCR._WORKER_OCR.preprocess_paths
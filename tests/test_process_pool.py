@@ -0,0 +1,14 @@
+import multiprocessing
+
+from service.processPool import worker_context
+
+
+def test_forkserver_is_used_where_available():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        assert worker_context().get_start_method() == "forkserver"
+
+
+def test_platform_default_without_forkserver(monkeypatch):
+    monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+
+    assert worker_context() is multiprocessing.get_context()
@@ -0,0 +1,38 @@
+import random
+import threading
+
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from config.qdrant import _LockedQdrantClient
+
+
+def test_local_client_serves_searches_while_upserting(tmp_path):
+    client = _LockedQdrantClient(path=str(tmp_path / "qdrant"))
+    client.create_collection("docs", vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+    errors = []
+    done = threading.Event()
+
+    def vector():
+        return [random.random() for _ in range(8)]
+
+    def write():
+        for batch in range(100):
+            client.upsert("docs", [PointStruct(id=batch * 10 + i, vector=vector()) for i in range(10)])
+        done.set()
+
+    def search():
+        while not done.is_set():
+            try:
+                client.query_points("docs", query=vector(), limit=5)
+            except Exception as error:
+                errors.append(error)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=search) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert client.count("docs").count == 1000
+    client.close()
@@ -0,0 +1,38 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+from qdrant_client.models import PointStruct
+
+import config.qdrant
+from config.rag import get_rag_client
+from service.rag import RagEngine
+
+
+class ConstantEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [[1.0, 0.0, 0.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0, 0.0]
+
+
+def test_collection_dropped_behind_the_registry_is_recovered(monkeypatch):
+    client = config.qdrant._LockedQdrantClient(location=":memory:")
+    monkeypatch.setattr(config.qdrant, "_QDRANT_CLIENT", client)
+    monkeypatch.setattr(config.qdrant, "_EMBEDDINGS", ConstantEmbeddings())
+    config.qdrant.forget_collection("globex")
+
+    collection_name = get_rag_client("Globex").vectorstore.collection_name
+    client.delete_collection(collection_name)
+
+    # The registry and the cached RAG client still believe it exists.
+    docs = asyncio.run(RagEngine()._retrieve("Globex", "hours?", [1.0, 0.0, 0.0, 0.0]))
+    assert docs == []
+
+    client.upsert(collection_name, [PointStruct(
+        id=1,
+        vector=[1.0, 0.0, 0.0, 0.0],
+        payload={"page_content": "Open nine to five.", "metadata": {"source": "hours.txt"}},
+    )])
+    docs = asyncio.run(RagEngine()._retrieve("Globex", "hours?", [1.0, 0.0, 0.0, 0.0]))
+    assert [doc.page_content for doc in docs] == ["Open nine to five."]
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from google.genai import errors
+
+import service.rawText2json
+from service.fakeGenai import FakeGenaiClient
+from service.rawText2json import RawText2JsonService
+
+RECEIPTS = ["Alpha Mart\nMilk", "Beta Foods\nBread", "Gamma Deli\nSoup"]
+
+
+def _rate_limited() -> errors.APIError:
+    return errors.APIError(429, {"error": {"code": 429, "message": "Resource exhausted", "status": "RESOURCE_EXHAUSTED"}})
+
+
+def test_rate_limited_call_is_retried(monkeypatch):
+    monkeypatch.setattr(service.rawText2json, "GENAI_BACKOFF_BASE", 0.001)
+    client = FakeGenaiClient(latency=0, failures=[_rate_limited(), _rate_limited()])
+    parser = RawText2JsonService(client=client, heuristics=False)
+
+    receipt = asyncio.run(parser.aparse_receipt(RECEIPTS[0]))
+
+    assert receipt["merchant_name"] == "Alpha Mart"
+    assert len(client.calls) == 3
+
+
+def test_rate_limit_gives_up_after_the_last_retry(monkeypatch):
+    monkeypatch.setattr(service.rawText2json, "GENAI_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(service.rawText2json, "GENAI_MAX_RETRIES", 2)
+    client = FakeGenaiClient(latency=0, failures=[_rate_limited()] * 3)
+    parser = RawText2JsonService(client=client, heuristics=False)
+
+    assert asyncio.run(parser.aparse_receipt(RECEIPTS[0])) == {}
+    assert len(client.calls) == 3
+
+
+def test_slow_call_times_out(monkeypatch):
+    monkeypatch.setattr(service.rawText2json, "GENAI_TIMEOUT", 0.05)
+    parser = RawText2JsonService(client=FakeGenaiClient(latency=5), heuristics=False)
+
+    started = time.monotonic()
+    assert asyncio.run(parser.aparse_receipt(RECEIPTS[0])) == {}
+    assert time.monotonic() - started < 1
+
+
+def _garble_batches(client: FakeGenaiClient, rewrite) -> None:
+    respond = client.aio.models._respond
+
+    def garbled(contents):
+        response = respond(contents)
+        if isinstance(response.parsed, list):
+            response.parsed = rewrite(response.parsed)
+        return response
+
+    client.aio.models._respond = garbled
+
+
+def test_batch_receipts_missing_or_duplicated_are_parsed_alone():
+    client = FakeGenaiClient(latency=0)
+    # Receipt 0 comes back twice (the second copy claiming to be a different
+    # merchant) and receipt 1 not at all.
+    _garble_batches(client, lambda parsed: [parsed[0], {**parsed[0], "merchant_name": "Wrong"}, parsed[2]])
+    parser = RawText2JsonService(client=client, batch_mode=True, heuristics=False)
+
+    receipts = asyncio.run(parser.aparse_receipts(RECEIPTS))
+
+    assert [receipt["merchant_name"] for receipt in receipts] == ["Alpha Mart", "Beta Foods", "Gamma Deli"]
+    assert all("receipt_index" not in receipt for receipt in receipts)
+    # One batch call, then one single call for the receipt it dropped.
+    assert len(client.calls) == 2
+    assert "RECEIPTS:" not in client.calls[1] and "Beta Foods" in client.calls[1]
+
+
+def test_batch_with_bad_receipt_indexes_falls_back_per_receipt():
+    client = FakeGenaiClient(latency=0)
+    _garble_batches(client, lambda parsed: [{**receipt, "receipt_index": "0"} for receipt in parsed])
+    parser = RawText2JsonService(client=client, batch_mode=True, heuristics=False)
+
+    receipts = asyncio.run(parser.aparse_receipts(RECEIPTS))
+
+    assert [receipt["merchant_name"] for receipt in receipts] == ["Alpha Mart", "Beta Foods", "Gamma Deli"]
+    assert len(client.calls) == 4
@@ -0,0 +1,14 @@
+from service.receiptHeuristics import HeuristicReceiptParser, _amounts
+
+
+def test_dotted_dates_are_not_amounts():
+    assert _amounts("Date 05.06.2024 12:30") == []
+    assert _amounts("Total 1.234,56") == [1234.56]
+
+
+def test_quantity_markers_are_stripped_from_item_names():
+    receipt, _ = HeuristicReceiptParser().parse("2 x Apples @ 1.50  3.00\nTOTAL 3.00")
+
+    assert receipt["items"] == [
+        {"item_name": "Apples", "quantity": 2.0, "unit_price": 1.5, "total_price": 3.0}
+    ]